@@ -5,6 +5,7 @@ import (
 	"github.com/streadway/amqp"
 	"sync"
 	"encoding/json"
+	"time"
 
 )
 
@@ -107,6 +108,7 @@ func SendCleanToQueue(ch *amqp.Channel, url string, content string) error {
         false,
         amqp.Publishing{
             ContentType: "application/json",
+            Timestamp:   time.Now(),
             Body:        body,
         },
     )
@@ -0,0 +1,183 @@
+"""
+Microbenchmarks for the sentiment hot paths.
+
+Runs offline against synthetic articles and a synthetic ModelTrainer (see
+benchmarks/fixtures.py), so numbers are comparable across commits without
+the training dataset or any service running. Run from sentment_api/:
+
+    python -m benchmarks.bench_hotpaths --output bench.json
+    python -m benchmarks.bench_hotpaths --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+import sklearn
+from core.config import settings
+from services.search import DEFAULT_STOPWORDS_PATH
+from services.text_cleaner import TextCleaner
+from benchmarks.fixtures import make_articles, make_trainer
+
+BATCH_SIZES = (1, 32, 1024)
+BENCH_FORMAT_VERSION = 1
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(fn, min_time: float, repeat: int):
+    """Seconds per call: double the loop count until a run takes min_time, then time `repeat` runs"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time and number < 1_000_000:
+        number *= 2
+    runs = [timer.timeit(number) / number for _ in range(repeat)]
+    return number, runs
+
+
+def build_cases(articles, trainer, cleaner):
+    cleaned = cleaner.clean_many(articles)
+    vectors = trainer.vectorizer.transform(cleaned)
+
+    cases = []
+    for batch_size in BATCH_SIZES:
+        raw_batch = articles[:batch_size]
+        clean_batch = cleaned[:batch_size]
+        X = vectors[:batch_size]
+
+        cases.extend([
+            ("text_cleaner.clean", batch_size, lambda b=raw_batch: cleaner.clean_many(b)),
+            ("vectorizer.transform", batch_size, lambda b=clean_batch: trainer.vectorizer.transform(b)),
+            ("mlp.forward", batch_size, lambda X=X: trainer.mlp_model.forward(X)),
+            ("hmm.predict_proba", batch_size, lambda X=X: trainer.hmm_model.predict_proba(X)),
+        ])
+
+        if batch_size == 1:
+            cases.append(("trainer.predict_sentiment", 1,
+                          lambda text=clean_batch[0]: trainer.predict_sentiment(text)))
+        else:
+            cases.append(("trainer.predict_sentiment", batch_size,
+                          lambda b=clean_batch: trainer.predict_sentiment_batch(b)))
+
+    return cases
+
+
+def run(args):
+    articles = make_articles(max(BATCH_SIZES), sentences=args.sentences, seed=args.seed)
+    cleaner = TextCleaner(str(DEFAULT_STOPWORDS_PATH))
+
+    # MLP.train prints its loss; keep stdout for the JSON report
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer = make_trainer(seed=args.seed)
+
+    results = []
+    for name, batch_size, fn in build_cases(articles, trainer, cleaner):
+        if args.only and not any(part in name for part in args.only):
+            continue
+
+        number, runs = measure(fn, args.min_time, args.repeat)
+        median = statistics.median(runs)
+        results.append({
+            "name": name,
+            "batch_size": batch_size,
+            "loops": number,
+            "repeat": len(runs),
+            "median_s": median,
+            "min_s": min(runs),
+            "max_s": max(runs),
+            "per_item_us": median / batch_size * 1e6,
+            "items_per_s": batch_size / median if median else None,
+        })
+        print(f"{name:28} batch={batch_size:<5} {median * 1e3:10.3f} ms/call "
+              f"{median / batch_size * 1e6:10.1f} us/item", file=sys.stderr)
+
+    return {
+        "format_version": BENCH_FORMAT_VERSION,
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": platform.machine(),
+            "vectorizer": settings.VECTORIZER,
+            "max_features": settings.MAX_FEATURES,
+            "mlp_hidden_size": settings.MLP_HIDDEN_SIZE,
+            "article_sentences": args.sentences,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold: float) -> bool:
+    """Print per-case change against baseline; False if any case slowed down past threshold"""
+    previous = {(r["name"], r["batch_size"]): r for r in baseline.get("results", [])}
+    ok = True
+
+    print(f"{'case':36} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for result in report["results"]:
+        key = (result["name"], result["batch_size"])
+        before = previous.get(key)
+        if before is None:
+            continue
+
+        change = result["median_s"] / before["median_s"] - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{key[0] + ' x' + str(key[1]):36} {before['median_s'] * 1e3:10.3f}ms "
+              f"{result['median_s'] * 1e3:10.3f}ms {change:+8.1%}{flag}", file=sys.stderr)
+
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment hot paths")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown that counts as a regression (default 0.10)")
+    parser.add_argument("--only", nargs="*", help="Only run cases whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sentences", type=int, default=20, help="Sentences per synthetic article")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
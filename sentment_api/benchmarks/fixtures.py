@@ -0,0 +1,112 @@
+import random
+from typing import List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import LabelEncoder
+from models.train_models import ModelTrainer
+from models.mlp_model import MLP
+from models.hmm_model import HMM
+from models.vectorizer import build_vectorizer
+from core.config import settings
+
+# Offline stand-ins for detik/tempo article bodies: plain Indonesian prose
+# mixed with the boilerplate TextCleaner exists to strip
+LEAD_INS = [
+    "Jakarta, CNN Indonesia -- ",
+    "JAKARTA, KOMPAS.com - ",
+    "TEMPO.CO, Jakarta - ",
+    "Bandung - ",
+    "",
+]
+
+SENTENCES = [
+    "Pemerintah menyatakan pertumbuhan ekonomi kuartal ini melampaui target yang ditetapkan sebelumnya.",
+    "Harga beras di sejumlah pasar tradisional kembali naik menjelang akhir pekan.",
+    "Warga mengeluhkan banjir yang merendam permukiman sejak Senin pagi.",
+    "Polisi masih menyelidiki penyebab kecelakaan yang melibatkan tiga kendaraan tersebut.",
+    "Tim nasional berhasil meraih kemenangan penting dalam laga kualifikasi semalam.",
+    "Menteri keuangan menegaskan defisit anggaran tetap berada dalam batas aman.",
+    "Sejumlah pedagang mengaku omzet mereka turun drastis akibat sepinya pembeli.",
+    "Program bantuan sosial diharapkan dapat meringankan beban masyarakat kecil.",
+    "Kebakaran hutan di wilayah tersebut menyebabkan kualitas udara memburuk.",
+    "Investor asing mencatatkan pembelian bersih di pasar saham hari ini.",
+    "Kementerian kesehatan mengimbau masyarakat tetap waspada terhadap demam berdarah.",
+    "Proyek jalan tol itu ditargetkan rampung dan beroperasi pada akhir tahun depan.",
+]
+
+BOILERPLATE = [
+    "Baca juga: Harga Emas Hari Ini Turun Tipis.",
+    "Simak Video: Detik-detik Banjir Rendam Jalan Protokol",
+    "ADVERTISEMENT SCROLL TO CONTINUE WITH CONTENT",
+    "Pilihan Editor: Daftar Lengkap Pemenang Penghargaan",
+    "Lihat juga video lainnya di https://www.detik.com/video.",
+    "Ikuti kami di @detikcom dan #BeritaTerkini",
+    "&nbsp;&quot;Kami optimistis,&quot; ujarnya.",
+    "© 2024 Tempo Media Group. All rights reserved.",
+    "Reporter ini berkontribusi dalam penulisan artikel",
+]
+
+
+def make_articles(n: int, sentences: int = 20, boilerplate_ratio: float = 0.2,
+                  seed: int = 0) -> List[str]:
+    """Generate n synthetic article bodies of roughly `sentences` sentences each"""
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(n):
+        parts = [rng.choice(LEAD_INS) + rng.choice(SENTENCES)]
+        for _ in range(max(sentences - 1, 0)):
+            if rng.random() < boilerplate_ratio:
+                parts.append(rng.choice(BOILERPLATE))
+            else:
+                parts.append(rng.choice(SENTENCES))
+        articles.append(" ".join(parts))
+    return articles
+
+
+def make_trainer(n_docs: int = 500, max_features: Optional[int] = None,
+                 hidden_size: Optional[int] = None, seed: int = 0) -> ModelTrainer:
+    """
+    Build a ready ModelTrainer from synthetic documents, without the datasets
+    download. Weights are random-ish but shapes, dtypes and code paths match
+    the real models, which is all the benchmarks need.
+    """
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)
+
+    vocabulary_size = max_features or settings.MAX_FEATURES
+    words = [f"kata{i}" for i in range(vocabulary_size)] + sorted(
+        {word.strip(".,").lower() for sentence in SENTENCES for word in sentence.split()}
+    )
+    documents = [" ".join(rng.choice(words, 60)) for _ in range(n_docs)]
+    labels = rng.choice(["0", "1", "neutral"], n_docs)
+
+    trainer = ModelTrainer()
+    trainer.label_encoder = LabelEncoder()
+    y = trainer.label_encoder.fit_transform(labels)
+
+    if settings.VECTORIZER == "hashing":
+        trainer.vectorizer = build_vectorizer()
+    else:
+        trainer.vectorizer = CountVectorizer(
+            max_features=vocabulary_size,
+            stop_words=None,
+            dtype=np.float64
+        )
+    X = trainer.vectorizer.fit_transform(documents)
+
+    trainer.mlp_model = MLP(
+        input_size=X.shape[1],
+        hidden_size=hidden_size or settings.MLP_HIDDEN_SIZE,
+        output_size=len(trainer.label_encoder.classes_),
+        learning_rate=settings.MLP_LEARNING_RATE
+    )
+    trainer.mlp_model.train(X, y, epochs=1)
+    trainer.mlp_model.is_trained = True
+
+    trainer.hmm_model = HMM(len(trainer.label_encoder.classes_), X.shape[1])
+    trainer.hmm_model.fit(X, y, max_iter=1)
+
+    trainer.model_version = f"synthetic-{seed}"
+    trainer.training_completed = True
+    return trainer
@@ -0,0 +1,300 @@
+"""
+End-to-end load test for RabbitMQConsumer without RabbitMQ or Postgres.
+
+A synthetic article stream is published to an in-memory queue that delivers
+to the consumer the way aio_pika does (at most prefetch unacked messages in
+flight), predictions go through the real InferenceExecutor and
+PredictionCache, and DatabaseService is replaced by an in-memory stand-in
+with configurable write latency. Run from sentment_api/:
+
+    python -m benchmarks.load_test --messages 5000 --duplicate-ratio 0.3
+    python -m benchmarks.load_test --rate 200 --burst-size 500 --burst-interval 5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+from core.config import settings
+from services.consumer import RabbitMQConsumer
+from services.inference import InferenceExecutor
+from services.prediction_cache import PredictionCache
+from services.prediction_sink import PredictionSink
+from benchmarks.fixtures import make_articles, make_trainer
+
+
+class InMemoryMessage:
+    """Stand-in for aio_pika's AbstractIncomingMessage, recording when it was settled"""
+
+    def __init__(self, broker, body: bytes, published_at: float):
+        self.broker = broker
+        self.body = body
+        self.timestamp = datetime.now(timezone.utc)
+        self.published_at = published_at
+        self.settled_at: Optional[float] = None
+        self.outcome: Optional[str] = None
+
+    async def ack(self):
+        self._settle("ack")
+
+    async def nack(self, requeue: bool = True):
+        self._settle("nack")
+
+    def _settle(self, outcome: str):
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        self.settled_at = time.perf_counter()
+        self.broker.settled(self)
+
+
+class InMemoryBroker:
+    """Delivers published messages to a consumer callback, honouring a prefetch limit"""
+
+    def __init__(self, prefetch_count: int):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(prefetch_count)
+        self.in_flight = 0
+        self.settled_messages: List[InMemoryMessage] = []
+        self.tasks = set()
+
+    def publish(self, body: bytes):
+        self.queue.put_nowait(InMemoryMessage(self, body, time.perf_counter()))
+
+    def settled(self, message: InMemoryMessage):
+        self.in_flight -= 1
+        self.settled_messages.append(message)
+        self.slots.release()
+
+    async def deliver(self, callback):
+        while True:
+            await self.slots.acquire()
+            message = await self.queue.get()
+            self.in_flight += 1
+            task = asyncio.create_task(callback(message))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+
+class InMemoryDatabaseService:
+    """Stand-in for DatabaseService that keeps predictions in a dict"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rows: Dict[str, tuple] = {}
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def save_prediction(self, url: str, content: str, mlp_label, hmm_label, model_version=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.rows[url] = (mlp_label, hmm_label)
+    
+    async def save_predictions(self, rows):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for url, mlp_label, hmm_label, model_version in rows:
+            self.rows[url] = (mlp_label, hmm_label)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KiB on Linux; peak rather than current, but better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_stream(args) -> List[bytes]:
+    rng = random.Random(args.seed)
+    unique = make_articles(
+        args.messages,
+        sentences=args.max_sentences,
+        seed=args.seed
+    )
+
+    bodies = []
+    for i in range(args.messages):
+        if bodies and rng.random() < args.duplicate_ratio:
+            # Same content under a new URL, as when an article is syndicated
+            content = json.loads(rng.choice(bodies))["content"]
+        else:
+            sentences = unique[i].split(". ")
+            content = ". ".join(sentences[:rng.randint(args.min_sentences, args.max_sentences)])
+        bodies.append(json.dumps({"url": f"https://example.com/artikel/{i}", "content": content}).encode("utf-8"))
+    return bodies
+
+
+async def publish_stream(broker: InMemoryBroker, bodies: List[bytes], args):
+    """Publish at --rate messages/s (0 = all at once), or in bursts of --burst-size"""
+    if args.burst_size:
+        for start in range(0, len(bodies), args.burst_size):
+            for body in bodies[start:start + args.burst_size]:
+                broker.publish(body)
+            await asyncio.sleep(args.burst_interval)
+        return
+
+    if not args.rate:
+        for body in bodies:
+            broker.publish(body)
+        return
+
+    interval = 1.0 / args.rate
+    started = time.perf_counter()
+    for i, body in enumerate(bodies):
+        delay = started + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        broker.publish(body)
+
+
+async def sample_memory(broker: InMemoryBroker, samples: list, started: float, interval: float):
+    while True:
+        samples.append({
+            "t": round(time.perf_counter() - started, 3),
+            "settled": len(broker.settled_messages),
+            "in_flight": broker.in_flight,
+            "queued": broker.queue.qsize(),
+            "rss_mb": round(current_rss_mb(), 1),
+        })
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    # MLP.train prints its loss; keep stdout for the JSON report
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer = make_trainer(seed=args.seed)
+
+    cache = PredictionCache(max_size=args.cache_size, redis_url="")
+    executor = InferenceExecutor(kind=args.executor, cache=cache)
+    executor.bind(trainer)
+
+    db_service = InMemoryDatabaseService(latency=args.db_latency)
+    consumer = RabbitMQConsumer(trainer, executor, db_service)
+    consumer.batch_size = max(1, args.batch_size)
+    consumer.prediction_sink = None
+    if args.sink_batch_size > 1:
+        consumer.prediction_sink = PredictionSink(
+            db_service, max_batch=args.sink_batch_size, flush_interval=args.sink_flush_interval
+        )
+    consumer.running = True
+
+    prefetch_count = consumer.prefetch_count(args.prefetch)
+    broker = InMemoryBroker(prefetch_count)
+
+    if consumer.batch_size > 1:
+        consumer.batch_queue = asyncio.Queue()
+        consumer.batch_task = asyncio.create_task(consumer._batch_loop())
+        callback = consumer.enqueue_message
+    else:
+        callback = consumer.process_message
+
+    bodies = make_stream(args)
+    samples = []
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(broker, samples, started, args.sample_interval))
+    delivery = asyncio.create_task(broker.deliver(callback))
+
+    await publish_stream(broker, bodies, args)
+    while len(broker.settled_messages) < len(bodies):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    for task in (sampler, delivery, consumer.batch_task):
+        if task:
+            task.cancel()
+    executor.shutdown()
+
+    latencies = np.array([m.settled_at - m.published_at for m in broker.settled_messages])
+    outcomes = {}
+    for message in broker.settled_messages:
+        outcomes[message.outcome] = outcomes.get(message.outcome, 0) + 1
+
+    return {
+        "config": {
+            "messages": args.messages,
+            "rate": args.rate,
+            "burst_size": args.burst_size,
+            "burst_interval": args.burst_interval,
+            "min_sentences": args.min_sentences,
+            "max_sentences": args.max_sentences,
+            "duplicate_ratio": args.duplicate_ratio,
+            "batch_size": consumer.batch_size,
+            "prefetch": prefetch_count,
+            "executor": executor.kind,
+            "workers": executor.max_workers,
+            "cache_size": args.cache_size,
+            "db_latency": args.db_latency,
+            "sink_batch_size": args.sink_batch_size,
+            "vectorizer": settings.VECTORIZER,
+            "max_features": settings.MAX_FEATURES,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(bodies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)) * 1e3, 3),
+            "p90": round(float(np.percentile(latencies, 90)) * 1e3, 3),
+            "p99": round(float(np.percentile(latencies, 99)) * 1e3, 3),
+            "max": round(float(latencies.max()) * 1e3, 3),
+        },
+        "outcomes": outcomes,
+        "consumer_stats": consumer.get_stats(),
+        "inference_stats": executor.get_stats(),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "memory": samples,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test RabbitMQConsumer with in-memory stand-ins")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0, help="Messages per second (0 = publish all at once)")
+    parser.add_argument("--burst-size", type=int, default=0, help="Publish in bursts of this many messages")
+    parser.add_argument("--burst-interval", type=float, default=1.0, help="Seconds between bursts")
+    parser.add_argument("--min-sentences", type=int, default=5)
+    parser.add_argument("--max-sentences", type=int, default=40)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0,
+                        help="Fraction of messages repeating earlier content")
+    parser.add_argument("--batch-size", type=int, default=settings.CONSUMER_BATCH_SIZE)
+    parser.add_argument("--prefetch", type=int, default=settings.CONSUMER_PREFETCH_COUNT)
+    parser.add_argument("--executor", choices=["thread", "process"], default=settings.INFERENCE_EXECUTOR)
+    parser.add_argument("--cache-size", type=int, default=settings.PREDICTION_CACHE_SIZE)
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Seconds per simulated DB write")
+    parser.add_argument("--sink-batch-size", type=int, default=settings.DB_SINK_BATCH_SIZE,
+                        help="Write-behind batch size (1 = one write per message)")
+    parser.add_argument("--sink-flush-interval", type=float, default=settings.DB_SINK_FLUSH_INTERVAL)
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between memory samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    print(f"{report['throughput_per_s']} msg/s, p50 {report['latency_ms']['p50']}ms, "
+          f"p99 {report['latency_ms']['p99']}ms, peak RSS {report['peak_rss_mb']}MB", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import asyncio
+import fcntl
+import os
+from pathlib import Path
+from typing import Optional
+from core.config import settings
+
+# Lock file names under LOCK_DIR
+TRAIN_LOCK_NAME = ".train.lock"
+FEEDBACK_LOCK_NAME = ".feedback.lock"
+CONSUMER_LOCK_PREFIX = ".consumer-"
+
+
+def lock_dir() -> Path:
+    path = Path(settings.LOCK_DIR or settings.MODEL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class FileLock:
+    """
+    Exclusive flock() on a file, shared between processes on the same host.
+
+    The kernel drops the lock when the holding process exits, so a crashed
+    worker never leaves a stale lock behind.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self.fd is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self.fd is not None:
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except Exception:
+            os.close(fd)
+            raise
+
+        self.fd = fd
+        return True
+
+    async def acquire_async(self, poll_interval: float = 1.0):
+        """Wait for the lock without blocking the event loop; cancellation leaves it unheld"""
+        while not self.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+
+    def release(self):
+        if self.fd is None:
+            return
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+def acquire_consumer_slot(slots: int) -> Optional[FileLock]:
+    """Try to take one of `slots` consumer locks; None when all are held by other processes"""
+    directory = lock_dir()
+    for slot in range(slots):
+        lock = FileLock(directory / f"{CONSUMER_LOCK_PREFIX}{slot}.lock")
+        if lock.acquire(blocking=False):
+            return lock
+    return None
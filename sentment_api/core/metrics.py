@@ -0,0 +1,124 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# Latency buckets in seconds, from sub-millisecond model passes up to slow DB writes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# A registry of our own rather than prometheus_client's global one, so
+# /metrics/prometheus exposes exactly the pipeline metrics below. Worker
+# timings are shipped back to the process owning the registry and recorded there.
+REGISTRY = CollectorRegistry()
+
+# (family name, family type, sample name, sorted labels) -> cumulative value
+MetricsSnapshot = Dict[Tuple[str, str, str, Tuple[Tuple[str, str], ...]], float]
+
+# Callables returning the snapshots other processes (supervised consumer
+# workers) sent, added into this process's series when rendering
+_forwarded_sources: List[Callable[[], MetricsSnapshot]] = []
+
+STAGE_SECONDS = Histogram(
+    "sentiment_stage_seconds",
+    "Time spent in each pipeline stage per message or batch",
+    ["stage"],
+    buckets=DEFAULT_BUCKETS,
+    registry=REGISTRY
+)
+QUEUE_LAG_SECONDS = Histogram(
+    "sentiment_queue_lag_seconds",
+    "Delay between a message being published and the consumer processing it",
+    buckets=LAG_BUCKETS,
+    registry=REGISTRY
+)
+MESSAGES_TOTAL = Counter(
+    "sentiment_messages_total",
+    "Consumed messages by outcome",
+    ["outcome"],
+    registry=REGISTRY
+)
+MESSAGES_IN_FLIGHT = Gauge(
+    "sentiment_messages_in_flight",
+    "Messages received by the consumer and not yet acked or nacked",
+    registry=REGISTRY
+)
+INFERENCE_PENDING = Gauge(
+    "sentiment_inference_pending",
+    "Calls queued or running on the inference executor",
+    registry=REGISTRY
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response starts",
+    ["method", "route", "status"],
+    buckets=DEFAULT_BUCKETS,
+    registry=REGISTRY
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    registry=REGISTRY
+)
+
+
+def snapshot_metrics() -> MetricsSnapshot:
+    """This process's samples in a picklable form, for forwarding to the process serving /metrics"""
+    snapshot = {}
+    for family in REGISTRY.collect():
+        for sample in family.samples:
+            # Creation timestamps don't add up across processes; the receiver keeps its own
+            if sample.name.endswith("_created"):
+                continue
+            labels = tuple(sorted(sample.labels.items()))
+            snapshot[(family.name, family.type, sample.name, labels)] = sample.value
+    return snapshot
+
+
+def add_forwarded_source(source: Callable[[], MetricsSnapshot]):
+    _forwarded_sources.append(source)
+
+
+def remove_forwarded_source(source: Callable[[], MetricsSnapshot]):
+    if source in _forwarded_sources:
+        _forwarded_sources.remove(source)
+
+
+class _ForwardedCollector:
+    """REGISTRY with the forwarded samples summed into the matching series"""
+
+    def collect(self):
+        forwarded: Dict[str, Dict[tuple, float]] = {}
+        for source in _forwarded_sources:
+            for (family_name, _, sample_name, labels), value in source().items():
+                series = forwarded.setdefault(family_name, {})
+                series[(sample_name, labels)] = series.get((sample_name, labels), 0.0) + value
+
+        for family in REGISTRY.collect():
+            extra = forwarded.get(family.name)
+            if extra:
+                samples = []
+                for sample in family.samples:
+                    value = extra.pop((sample.name, tuple(sorted(sample.labels.items()))), None)
+                    samples.append(sample if value is None else sample._replace(value=sample.value + value))
+                family.samples = samples
+                # Series only other processes have, e.g. label values never used here
+                for (sample_name, labels), value in extra.items():
+                    family.add_sample(sample_name, dict(labels), value)
+            yield family
+
+
+def render_metrics() -> bytes:
+    """
+    REGISTRY, plus anything forwarded by other processes, in the Prometheus
+    text exposition format (served as CONTENT_TYPE_LATEST)
+    """
+    if not _forwarded_sources:
+        return generate_latest(REGISTRY)
+    return generate_latest(_ForwardedCollector())
+
+
+def observe_stages(timings: Optional[Dict[str, float]]):
+    if not timings:
+        return
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
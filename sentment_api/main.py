@@ -1,46 +1,107 @@
 import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router
-from models.train_models import ModelTrainer
 from services.consumer import RabbitMQConsumer
+from services.consumer_supervisor import ConsumerSupervisor
+from services.inference import InferenceExecutor
+from services.prediction_cache import PredictionCache
+from services.database import DatabaseService, create_db_pool
+from services.broadcast import PredictionBroadcaster
+from services.model_manager import ModelManager
 from core.config import settings
+from core.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-model_trainer = None
+model_manager = None
+inference_executor = None
 consumer = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global model_trainer, consumer
+    global model_manager, inference_executor, consumer
     
     logger.info("Starting application")
     
-    logger.info("Training models")
-    model_trainer = ModelTrainer()
-    await model_trainer.train_all_models()
-    logger.info("Models training completed")
+    db_pool = None
+    try:
+        db_pool = await create_db_pool()
+        await DatabaseService(db_pool).create_table()
+        logger.info("Database pool created")
+    except Exception as e:
+        logger.error(f"Database pool creation failed: {e}")
+    app.state.db_pool = db_pool
     
-    logger.info("Starting RabbitMQ consumer")
-    consumer = RabbitMQConsumer(model_trainer)
-    consumer_task = asyncio.create_task(consumer.start_consuming())
-    logger.info("Consumer started")
+    prediction_cache = PredictionCache()
+    await prediction_cache.connect()
+    
+    inference_executor = InferenceExecutor(cache=prediction_cache)
+    prediction_broadcaster = PredictionBroadcaster()
+    
+    async def load_feedback():
+        # Stored /feedback corrections, cleaned like consumer input, for retraining
+        rows = await DatabaseService(db_pool).fetch_feedback()
+        loop = asyncio.get_running_loop()
+        texts = await loop.run_in_executor(
+            None, inference_executor.text_cleaner.clean_many, [row['content'] for row in rows]
+        )
+        return texts, [row['label'] for row in rows]
+    
+    model_manager = ModelManager(feedback_loader=load_feedback if db_pool else None)
+    
+    if settings.CONSUMER_PROCESSES > 0:
+        consumer = ConsumerSupervisor(broadcaster=prediction_broadcaster)
+    else:
+        consumer = RabbitMQConsumer(
+            None,
+            inference_executor,
+            DatabaseService(db_pool),
+            prediction_broadcaster
+        )
+    
+    def on_model_ready(model_trainer):
+        # Executor first so nothing can see the new trainer before it can be served.
+        # A ConsumerSupervisor rolls its worker processes onto the new trainer.
+        inference_executor.bind(model_trainer)
+        consumer.model_trainer = model_trainer
+        app.state.model_trainer = model_trainer
     
-    app.state.model_trainer = model_trainer
+    model_manager.add_listener(on_model_ready)
+    
+    app.state.model_trainer = None
+    app.state.model_manager = model_manager
+    app.state.inference_executor = inference_executor
+    app.state.prediction_broadcaster = prediction_broadcaster
     app.state.consumer = consumer
     
-    logger.info("Application ready")
+    # Models load in the background; DB-backed routes serve immediately and
+    # /ready reports when predictions are available
+    logger.info("Loading models in background")
+    model_manager.start()
+    if settings.MODEL_RELOAD_INTERVAL > 0:
+        model_manager.watch(settings.MODEL_RELOAD_INTERVAL)
+    
+    logger.info("Starting RabbitMQ consumer")
+    consumer_task = asyncio.create_task(consumer.start_consuming())
+    
+    logger.info("Application started")
     
     yield
     
     logger.info("Shutting down")
+    await model_manager.stop()
     if consumer:
         await consumer.stop()
     consumer_task.cancel()
+    inference_executor.shutdown()
+    await prediction_cache.close()
+    if db_pool:
+        await db_pool.close()
 
 app = FastAPI(
     title="Sentiment Analysis Consumer",
@@ -57,6 +118,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(request.method, route_path, status).observe(
+            time.perf_counter() - started
+        )
+
 app.include_router(router, prefix="/api/v1")
 
 @app.get("/")
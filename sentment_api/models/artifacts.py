@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from .hmm_model import HMM
+from .mlp_model import MLP
+from .vectorizer import build_vectorizer, describe_vectorizer, vectorizer_config, vectorizer_vocabulary
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 2: HMM raw count tables are stored so loaded models support partial_fit
+ARTIFACT_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+VOCABULARY_NAME = "vocabulary.json"
+
+
+def config_hash() -> str:
+    """Hash of the settings that change what a trained artifact looks like"""
+    config = {
+        "vectorizer": vectorizer_config(),
+        "mlp_hidden_size": settings.MLP_HIDDEN_SIZE,
+        "mlp_epochs": settings.MLP_EPOCHS,
+        "mlp_learning_rate": settings.MLP_LEARNING_RATE,
+        "hmm_max_iter": settings.HMM_MAX_ITER,
+    }
+    payload = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def split_version(version: str) -> Tuple[str, int]:
+    """
+    (base version, feedback count) of an artifact version. Models updated by
+    /feedback are saved as <base>+fb<n>, so they order after their base and
+    before the next retrain; this tuple is that order.
+    """
+    base, _, feedback = (version or "").partition("+fb")
+    return base, int(feedback) if feedback.isdigit() else 0
+
+
+def feedback_version(base: str, feedback_count: int) -> str:
+    return f"{split_version(base)[0]}+fb{feedback_count}"
+
+
+class ModelArtifactStore:
+    """
+    Versioned on-disk storage for a trained ModelTrainer.
+
+    Each version is a directory under MODEL_DIR holding one .npy file per
+    weight array, the vectorizer vocabulary (count vectorizers only; hashing
+    ones are rebuilt from the manifest) and a JSON manifest. Versions are
+    written to a temporary directory and renamed into place, so a reader
+    never sees a partially written artifact.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = Path(base_dir or settings.MODEL_DIR)
+
+    def save(self, trainer, version: Optional[str] = None) -> str:
+        """Save trainer as version (default: a new timestamped base version); returns the version"""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+        cfg_hash = config_hash()
+        created_at = datetime.now(timezone.utc)
+        version = version or f"{created_at:%Y%m%dT%H%M%S%f}-{cfg_hash}"
+
+        arrays = {
+            "mlp_W1": trainer.mlp_model.W1,
+            "mlp_b1": trainer.mlp_model.b1,
+            "mlp_W2": trainer.mlp_model.W2,
+            "mlp_b2": trainer.mlp_model.b2,
+            "hmm_pi": trainer.hmm_model.pi,
+            "hmm_A": trainer.hmm_model.A,
+            "hmm_B": trainer.hmm_model.B,
+            "hmm_class_counts": trainer.hmm_model.class_counts,
+            "hmm_word_counts": trainer.hmm_model.word_counts,
+        }
+
+        vocabulary = vectorizer_vocabulary(trainer.vectorizer)
+
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "version": version,
+            "config_hash": cfg_hash,
+            "created_at": created_at.isoformat(),
+            "feedback_count": int(trainer.feedback_count),
+            "label_classes": trainer.label_encoder.classes_.tolist(),
+            "vectorizer": describe_vectorizer(trainer.vectorizer),
+            "mlp": {
+                "input_size": int(trainer.mlp_model.W1.shape[0]),
+                "hidden_size": int(trainer.mlp_model.W1.shape[1]),
+                "output_size": int(trainer.mlp_model.W2.shape[1]),
+                "learning_rate": trainer.mlp_model.lr,
+                "accuracy": float(trainer.mlp_accuracy),
+            },
+            "hmm": {
+                "n_states": int(trainer.hmm_model.n_states),
+                "n_emissions": int(trainer.hmm_model.n_emissions),
+                "accuracy": float(trainer.hmm_accuracy),
+            },
+            "arrays": sorted(arrays),
+        }
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.base_dir))
+        try:
+            for name, array in arrays.items():
+                np.save(tmp_dir / f"{name}.npy", array)
+
+            if vocabulary is not None:
+                with open(tmp_dir / VOCABULARY_NAME, "w", encoding="utf-8") as f:
+                    json.dump(vocabulary, f, ensure_ascii=False)
+
+            with open(tmp_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            os.rename(tmp_dir, self.base_dir / version)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Saved model artifact {version} to {self.base_dir}")
+        return version
+
+    def list_versions(self):
+        """Return artifact manifests, newest first"""
+        if not self.base_dir.is_dir():
+            return []
+
+        manifests = []
+        for path in self.base_dir.iterdir():
+            manifest_path = path / MANIFEST_NAME
+            if path.name.startswith(".") or not manifest_path.is_file():
+                continue
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable artifact {path.name}: {e}")
+
+        return sorted(manifests, key=lambda m: split_version(m.get("version", "")), reverse=True)
+
+    def find_latest_compatible(self) -> Optional[dict]:
+        cfg_hash = config_hash()
+        for manifest in self.list_versions():
+            if (manifest.get("format_version") == ARTIFACT_FORMAT_VERSION
+                    and manifest.get("config_hash") == cfg_hash):
+                return manifest
+        return None
+
+    def load_latest(self, trainer) -> Optional[str]:
+        manifest = self.find_latest_compatible()
+        if manifest is None:
+            return None
+
+        self.load(trainer, manifest)
+        return manifest["version"]
+
+    def has_version(self, version: str) -> bool:
+        return (self.base_dir / version / MANIFEST_NAME).is_file()
+
+    def load_version(self, trainer, version: str):
+        with open(self.base_dir / version / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            self.load(trainer, json.load(f))
+
+    def load(self, trainer, manifest: dict):
+        path = self.base_dir / manifest["version"]
+        # Read-only memory maps let every worker process share the same page cache
+        mmap_mode = "r" if settings.MODEL_MMAP else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in manifest["arrays"]}
+
+        vectorizer_info = manifest.get("vectorizer") or {"kind": "count"}
+        vocabulary = None
+        if vectorizer_info["kind"] == "count":
+            with open(path / VOCABULARY_NAME, "r", encoding="utf-8") as f:
+                vocabulary = json.load(f)
+
+        vectorizer = build_vectorizer(vectorizer_info, vocabulary)
+
+        label_encoder = LabelEncoder()
+        label_encoder.classes_ = np.array(manifest["label_classes"])
+
+        mlp_info = manifest["mlp"]
+        mlp_model = MLP(
+            input_size=mlp_info["input_size"],
+            hidden_size=mlp_info["hidden_size"],
+            output_size=mlp_info["output_size"],
+            learning_rate=mlp_info["learning_rate"]
+        )
+        mlp_model.W1 = arrays["mlp_W1"]
+        mlp_model.b1 = arrays["mlp_b1"]
+        mlp_model.W2 = arrays["mlp_W2"]
+        mlp_model.b2 = arrays["mlp_b2"]
+        mlp_model.is_trained = True
+
+        hmm_info = manifest["hmm"]
+        hmm_model = HMM(hmm_info["n_states"], hmm_info["n_emissions"])
+        hmm_model.pi = arrays["hmm_pi"]
+        hmm_model.A = arrays["hmm_A"]
+        hmm_model.B = arrays["hmm_B"]
+        hmm_model.class_counts = arrays["hmm_class_counts"]
+        hmm_model.word_counts = arrays["hmm_word_counts"]
+        hmm_model.precompute_log_params()
+        hmm_model.is_trained = True
+
+        trainer.vectorizer = vectorizer
+        trainer.label_encoder = label_encoder
+        trainer.mlp_model = mlp_model
+        trainer.hmm_model = hmm_model
+        trainer.mlp_accuracy = mlp_info["accuracy"]
+        trainer.hmm_accuracy = hmm_info["accuracy"]
+        trainer.model_version = manifest["version"]
+        trainer.feedback_count = manifest.get("feedback_count", 0)
+        trainer.training_completed = True
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import LabelEncoder
+from .vectorizer import build_vectorizer, describe_vectorizer, vectorizer_config, vectorizer_vocabulary
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 2: manifest describes the vectorizer; no vocabulary file for hashing
+DATASET_CACHE_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+VOCABULARY_NAME = "vocabulary.json"
+
+SEPID_DATASET = "sepidmnorozy/Indonesian_sentiment"
+INDONLU_DATASET = "indonlu"
+INDONLU_CONFIG = "smsa"
+
+ARRAY_NAMES = ("X_data", "X_indices", "X_indptr", "y")
+
+
+def dataset_key() -> str:
+    """Hash of everything that changes the featurized training set"""
+    config = {
+        "format_version": DATASET_CACHE_FORMAT_VERSION,
+        "datasets": [
+            [SEPID_DATASET, None, settings.SEPID_DATASET_REVISION],
+            [INDONLU_DATASET, INDONLU_CONFIG, settings.INDONLU_DATASET_REVISION],
+        ],
+        "vectorizer": vectorizer_config(),
+        "dtype": "float64",
+    }
+    payload = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class FeaturizedDataset:
+    def __init__(self, X, y, vectorizer, label_encoder):
+        self.X = X
+        self.y = y
+        self.vectorizer = vectorizer
+        self.label_encoder = label_encoder
+
+
+class DatasetCache:
+    """
+    On-disk cache of the featurized training set (CSR matrix, encoded labels,
+    vocabulary for count vectorizers and label classes), keyed by dataset_key().
+
+    The CSR components are stored as separate .npy files and loaded with
+    mmap_mode='r', so a cache hit costs a few page faults instead of the
+    dataset download, neutral filtering and vectorizer fit. Entries are
+    written to a temporary directory and renamed into place.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = Path(base_dir or settings.DATASET_CACHE_DIR)
+
+    def path(self, key: Optional[str] = None) -> Path:
+        return self.base_dir / (key or dataset_key())
+
+    def load(self) -> Optional[FeaturizedDataset]:
+        path = self.path()
+        manifest_path = path / MANIFEST_NAME
+        if not manifest_path.is_file():
+            return None
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != DATASET_CACHE_FORMAT_VERSION:
+            return None
+
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+
+        vectorizer_info = manifest["vectorizer"]
+        vocabulary = None
+        if vectorizer_info["kind"] == "count":
+            with open(path / VOCABULARY_NAME, "r", encoding="utf-8") as f:
+                vocabulary = json.load(f)
+
+        X = sp.csr_matrix(
+            (arrays["X_data"], arrays["X_indices"], arrays["X_indptr"]),
+            shape=tuple(manifest["shape"]),
+            copy=False
+        )
+
+        label_encoder = LabelEncoder()
+        label_encoder.classes_ = np.array(manifest["label_classes"])
+
+        logger.info(f"Loaded featurized dataset {path.name}: {X.shape[0]} rows, {X.nnz} non-zeros")
+        return FeaturizedDataset(X, arrays["y"], build_vectorizer(vectorizer_info, vocabulary), label_encoder)
+
+    def save(self, dataset: FeaturizedDataset) -> Path:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+        key = dataset_key()
+        X = sp.csr_matrix(dataset.X)
+        vocabulary = vectorizer_vocabulary(dataset.vectorizer)
+
+        manifest = {
+            "format_version": DATASET_CACHE_FORMAT_VERSION,
+            "key": key,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "shape": list(X.shape),
+            "nnz": int(X.nnz),
+            "label_classes": dataset.label_encoder.classes_.tolist(),
+            "revisions": {
+                SEPID_DATASET: settings.SEPID_DATASET_REVISION,
+                f"{INDONLU_DATASET}/{INDONLU_CONFIG}": settings.INDONLU_DATASET_REVISION,
+            },
+            "vectorizer": describe_vectorizer(dataset.vectorizer),
+        }
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.base_dir))
+        try:
+            np.save(tmp_dir / "X_data.npy", X.data)
+            np.save(tmp_dir / "X_indices.npy", X.indices)
+            np.save(tmp_dir / "X_indptr.npy", X.indptr)
+            np.save(tmp_dir / "y.npy", np.asarray(dataset.y))
+
+            if vocabulary is not None:
+                with open(tmp_dir / VOCABULARY_NAME, "w", encoding="utf-8") as f:
+                    json.dump(vocabulary, f, ensure_ascii=False)
+
+            with open(tmp_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            target = self.path(key)
+            try:
+                os.rename(tmp_dir, target)
+            except OSError:
+                if not target.is_dir():
+                    raise
+                # Another writer got there first; same key means same content
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return target
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Saved featurized dataset {key} to {self.base_dir}")
+        return target
@@ -7,47 +7,77 @@ class HMM:
         self.A = np.ones((n_states, n_states)) / n_states
         self.B = np.ones((n_states, n_emissions)) / n_emissions
         self.pi = np.ones(n_states) / n_states
+        self.log_pi = None
+        self.log_B = None
         self.feature_names = None
+        self.class_counts = None
+        self.word_counts = None
         self.is_trained = False
     
     def fit(self, X, y, max_iter=10):
-        n_samples = X.shape[0]
+        # Raw counts are kept so partial_fit can add new samples later
+        self.class_counts, self.word_counts = self._count(X, y)
+        self.update_params()
+        self.is_trained = True
+    
+    def partial_fit(self, X, y):
+        """Add labeled samples to the count tables without revisiting earlier data"""
+        if self.class_counts is None or self.word_counts is None:
+            raise ValueError("Model has no count tables; retrain to enable partial_fit")
         
-        for i in range(self.n_states):
-            self.pi[i] = np.sum(y == i) / n_samples
+        class_counts, word_counts = self._count(X, y)
+        # New arrays rather than +=, so memory-mapped (read-only) tables work and
+        # threads still predicting with the old parameters are unaffected
+        self.class_counts = self.class_counts + class_counts
+        self.word_counts = self.word_counts + word_counts
+        self.update_params()
+        self.is_trained = True
+    
+    def _count(self, X, y):
+        y = np.asarray(y)
+        class_counts = np.bincount(y, minlength=self.n_states).astype(np.float64)
+        word_counts = np.zeros((self.n_states, self.n_emissions))
         
         for i in range(self.n_states):
             X_i = X[y == i]
             if X_i.shape[0] > 0:
-                word_counts = np.sum(X_i, axis=0) + 1
-                self.B[i] = word_counts / np.sum(word_counts)
+                word_counts[i] = np.asarray(X_i.sum(axis=0)).ravel()
         
-        for i in range(self.n_states):
-            self.A[i] = self.pi
+        return class_counts, word_counts
+    
+    def update_params(self):
+        """Derive pi, A and B (add-one smoothed) from the count tables"""
+        self.pi = self.class_counts / np.sum(self.class_counts)
         
-        self.is_trained = True
+        smoothed = self.word_counts + 1
+        self.B = smoothed / np.sum(smoothed, axis=1, keepdims=True)
+        
+        self.A = np.tile(self.pi, (self.n_states, 1))
+        
+        self.precompute_log_params()
+    
+    def precompute_log_params(self):
+        # Inference only needs log-space parameters; computing them once keeps
+        # predict_proba down to a single matrix product per batch
+        with np.errstate(divide="ignore"):
+            self.log_pi = np.log(self.pi)
+            self.log_B = np.ascontiguousarray(np.log(self.B).T)
     
     def predict_proba(self, X):
         if not self.is_trained:
             raise ValueError("Model not trained")
             
-        n_samples = X.shape[0]
-        probs = np.zeros((n_samples, self.n_states))
-        
-        for i in range(n_samples):
-            for j in range(self.n_states):
-                state_prob = self.pi[j]
-                emission_probs = np.zeros(self.n_emissions)
-                
-                for k in range(self.n_emissions):
-                    if X[i, k] > 0:
-                        emission_probs[k] = np.log(self.B[j, k]) * X[i, k]
-                
-                log_prob = np.sum(emission_probs)
-                probs[i, j] = np.exp(log_prob) * state_prob
-            
-            if np.sum(probs[i]) > 0:
-                probs[i] /= np.sum(probs[i])
+        if self.log_B is None:
+            self.precompute_log_params()
+        
+        # (n_samples, n_emissions) @ (n_emissions, n_states); works for dense
+        # arrays and scipy sparse matrices alike
+        log_likelihood = np.asarray(X @ self.log_B) + self.log_pi
+        
+        max_log = np.max(log_likelihood, axis=1, keepdims=True)
+        max_log[~np.isfinite(max_log)] = 0.0
+        probs = np.exp(log_likelihood - max_log)
+        probs /= np.sum(probs, axis=1, keepdims=True)
         
         return probs
     
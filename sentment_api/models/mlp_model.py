@@ -17,13 +17,14 @@ class MLP:
         return exp_x / np.sum(exp_x, axis=1, keepdims=True)
     
     def forward(self, X):
-        self.z1 = np.dot(X, self.W1) + self.b1
+        # X may be a dense array or a scipy sparse matrix; `@` handles both
+        self.z1 = X @ self.W1 + self.b1
         self.a1 = self.relu(self.z1)
         self.z2 = np.dot(self.a1, self.W2) + self.b2
         self.a2 = self.softmax(self.z2)
         return self.a2
     
-    def backward(self, X, y, output):
+    def gradients(self, X, y, output):
         m = X.shape[0]
         
         dz2 = output - y
@@ -31,9 +32,14 @@ class MLP:
         db2 = np.sum(dz2, axis=0, keepdims=True) / m
         
         dz1 = np.dot(dz2, self.W2.T) * (self.a1 > 0)
-        dW1 = np.dot(X.T, dz1) / m
+        dW1 = X.T @ dz1 / m
         db1 = np.sum(dz1, axis=0, keepdims=True) / m
         
+        return dW1, db1, dW2, db2
+    
+    def backward(self, X, y, output):
+        dW1, db1, dW2, db2 = self.gradients(X, y, output)
+        
         self.W2 -= self.lr * dW2
         self.b2 -= self.lr * db2
         self.W1 -= self.lr * dW1
@@ -60,13 +66,39 @@ class MLP:
         
         self.is_trained = True
     
+    def partial_fit(self, X, y, epochs=1, batch_size=32):
+        """
+        Mini-batch updates on new samples only. Weights are replaced rather
+        than updated in place, so read-only memory-mapped weights work and
+        threads still predicting with the old arrays are unaffected.
+        """
+        y = np.asarray(y)
+        y_onehot = np.zeros((y.shape[0], self.W2.shape[1]))
+        y_onehot[np.arange(y.shape[0]), y] = 1
+        
+        for epoch in range(epochs):
+            indices = np.random.permutation(X.shape[0])
+            for i in range(0, X.shape[0], batch_size):
+                batch_indices = indices[i:i+batch_size]
+                X_batch = X[batch_indices]
+                
+                output = self.forward(X_batch)
+                dW1, db1, dW2, db2 = self.gradients(X_batch, y_onehot[batch_indices], output)
+                
+                self.W2 = self.W2 - self.lr * dW2
+                self.b2 = self.b2 - self.lr * db2
+                self.W1 = self.W1 - self.lr * dW1
+                self.b1 = self.b1 - self.lr * db1
+        
+        self.is_trained = True
+    
     def predict(self, X):
-        if not self.is_trained:
-            raise ValueError("Model not trained")
-        output = self.forward(X)
-        return np.argmax(output, axis=1)
+        return np.argmax(self.predict_proba(X), axis=1)
     
     def predict_proba(self, X):
         if not self.is_trained:
             raise ValueError("Model not trained")
-        return self.forward(X)
\ No newline at end of file
+        # Unlike forward(), keeps no activations on the instance, so concurrent
+        # inference threads cannot clobber each other's outputs
+        a1 = self.relu(X @ self.W1 + self.b1)
+        return self.softmax(np.dot(a1, self.W2) + self.b2)
\ No newline at end of file
@@ -1,17 +1,35 @@
 import numpy as np
+import scipy.sparse as sp
 import asyncio
+import copy
 import logging
+import time
+from datetime import datetime, timezone
 from datasets import load_dataset
-from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 from sklearn.preprocessing import LabelEncoder
 from .hmm_model import HMM
 from .mlp_model import MLP
+from .artifacts import ModelArtifactStore, feedback_version, split_version
+from .vectorizer import build_vectorizer
+from .dataset_cache import (
+    DatasetCache, FeaturizedDataset, SEPID_DATASET, INDONLU_DATASET, INDONLU_CONFIG
+)
 from core.config import settings
+from core.locks import FileLock, TRAIN_LOCK_NAME, lock_dir
 
 logger = logging.getLogger(__name__)
 
+# Feedback labels accepted by apply_feedback, mapped to the class indices that
+# _encode_for_db writes as "negatif" / "positif"; neutral is looked up by name
+# ("netral" is still accepted, rows written with it are relabelled by tools/migrate.py)
+FEEDBACK_LABELS = {
+    "negative": 0, "negatif": 0,
+    "positive": 1, "positif": 1,
+    "neutral": None, "netral": None,
+}
+
 class ModelTrainer:
     def __init__(self):
         self.mlp_model = None
@@ -21,11 +39,126 @@ class ModelTrainer:
         self.mlp_accuracy = 0.0
         self.hmm_accuracy = 0.0
         self.training_completed = False
+        self.model_version = None
+        self.feedback_count = 0
+    
+    async def load_or_train(self, force_train: bool = False, feedback_loader=None):
+        """
+        Load the newest compatible artifact or train and save a new one.
+        feedback_loader, an async callable returning (cleaned texts, labels)
+        of the stored /feedback corrections, is only called when training.
+        """
+        loop = asyncio.get_event_loop()
+        
+        if not force_train and settings.MODEL_STARTUP_MODE == "load":
+            if await loop.run_in_executor(None, self.load_artifacts):
+                logger.info(f"Loaded model artifact {self.model_version}")
+                return
+        
+        # Only one process trains at a time; the others wait and then load
+        # whatever it produced instead of training their own copy
+        waiting_since = datetime.now(timezone.utc)
+        train_lock = FileLock(lock_dir() / TRAIN_LOCK_NAME)
+        await train_lock.acquire_async()
+        try:
+            if await loop.run_in_executor(None, self._load_artifact_newer_than, waiting_since):
+                logger.info(f"Loaded model artifact {self.model_version} trained by another worker")
+                return
+            
+            feedback = None
+            if feedback_loader is not None:
+                try:
+                    feedback = await feedback_loader()
+                except Exception as e:
+                    logger.error(f"Failed to load stored feedback, training without it: {e}")
+            
+            await self.train_all_models(feedback)
+            
+            try:
+                await loop.run_in_executor(None, self.save_artifacts)
+            except Exception as e:
+                logger.error(f"Failed to save model artifact: {e}")
+        finally:
+            train_lock.release()
+    
+    def _load_artifact_newer_than(self, since: datetime) -> bool:
+        store = ModelArtifactStore()
+        manifest = store.find_latest_compatible()
+        if manifest is None or datetime.fromisoformat(manifest["created_at"]) < since:
+            return False
+        store.load(self, manifest)
+        return True
+    
+    def load_artifacts(self, base_dir=None) -> bool:
+        try:
+            version = ModelArtifactStore(base_dir).load_latest(self)
+        except Exception as e:
+            logger.error(f"Failed to load model artifact: {e}")
+            return False
+        
+        if version is None:
+            logger.info("No compatible model artifact found")
+            return False
+        return True
     
-    async def train_all_models(self):
+    def save_artifacts(self, base_dir=None) -> str:
+        if not self.training_completed:
+            raise ValueError("Models not ready")
+        
+        store = ModelArtifactStore(base_dir)
+        version = None
+        if self.feedback_count and store.has_version(split_version(self.model_version)[0]):
+            # Saved next to its base as <base>+fb<n>
+            version = self.model_version
+        self.model_version = store.save(self, version)
+        return self.model_version
+    
+    def label_indices(self, labels):
+        """Map feedback labels (positive/negative/neutral, English or Indonesian) to class indices"""
+        classes = self.label_encoder.classes_.tolist()
+        indices = []
+        for label in labels:
+            key = str(label).strip().lower()
+            if key not in FEEDBACK_LABELS:
+                raise ValueError(f"Unknown label {label!r}; expected one of {sorted(FEEDBACK_LABELS)}")
+            index = FEEDBACK_LABELS[key]
+            if index is None:
+                if "neutral" not in classes:
+                    raise ValueError("Model has no neutral class")
+                index = classes.index("neutral")
+            indices.append(index)
+        return np.array(indices, dtype=np.int64)
+    
+    def apply_feedback(self, texts, y) -> "ModelTrainer":
+        """
+        Return a copy of this trainer with both models updated on the labeled
+        texts. The vectorizer is shared and the original keeps serving
+        unchanged, so the copy can be swapped in like a freshly loaded model.
+        """
+        if not self.training_completed:
+            raise ValueError("Models not ready")
+        if not self.model_version:
+            # <base>+fb<n> has to order after its base, so the base must be a saved version
+            raise ValueError("Feedback needs a saved model; call save_artifacts first")
+        
+        X = self.vectorizer.transform(texts)
+        y = np.asarray(y)
+        
+        updated = copy.copy(self)
+        updated.mlp_model = copy.copy(self.mlp_model)
+        updated.mlp_model.partial_fit(X, y, epochs=settings.FEEDBACK_MLP_EPOCHS)
+        updated.hmm_model = copy.copy(self.hmm_model)
+        updated.hmm_model.partial_fit(X, y)
+        
+        updated.feedback_count = self.feedback_count + len(texts)
+        updated.model_version = feedback_version(self.model_version, updated.feedback_count)
+        return updated
+    
+    async def train_all_models(self, feedback=None):
+        """Train both models; feedback, (cleaned texts, labels), is added to the training split"""
         try:
             logger.info("Loading datasets")
-            X_train, X_test, y_train, y_test = await self._load_and_prepare_data()
+            X_train, X_test, y_train, y_test = await self._load_and_prepare_data(feedback)
             
             logger.info("Training MLP model")
             await self._train_mlp(X_train, X_test, y_train, y_test)
@@ -40,33 +173,76 @@ class ModelTrainer:
             logger.error(f"Training error: {e}")
             raise
     
-    async def _load_and_prepare_data(self):
-        ds_sepid = load_dataset("sepidmnorozy/Indonesian_sentiment")
+    async def _load_and_prepare_data(self, feedback=None):
+        # Dataset download and vectorizer fitting are blocking; keep them off the event loop
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._prepare_data, feedback)
+    
+    def _prepare_data(self, feedback=None):
+        cache = DatasetCache()
+        dataset = cache.load() if settings.DATASET_CACHE_ENABLED else None
+        
+        if dataset is None:
+            dataset = self._featurize_datasets()
+            if settings.DATASET_CACHE_ENABLED:
+                try:
+                    cache.save(dataset)
+                except Exception as e:
+                    logger.error(f"Failed to cache featurized dataset: {e}")
+        
+        self.vectorizer = dataset.vectorizer
+        self.label_encoder = dataset.label_encoder
+        X, y = dataset.X, dataset.y
+        
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        
+        # Corrections from /feedback train the new model but stay out of the
+        # test split, so accuracies remain comparable between retrains
+        if feedback is not None and len(feedback[0]):
+            texts, labels = feedback
+            X_train = sp.vstack([X_train, self.vectorizer.transform(texts)], format="csr")
+            y_train = np.concatenate([y_train, self.label_indices(labels)])
+            logger.info(f"Added {len(texts)} feedback samples to the training data")
+        self.feedback_count = 0
+        
+        logger.info(f"Data prepared: {X_train.shape[0]} train, {X_test.shape[0]} test samples")
+        return X_train, X_test, y_train, y_test
+    
+    def _featurize_datasets(self) -> FeaturizedDataset:
+        ds_sepid = load_dataset(SEPID_DATASET, revision=settings.SEPID_DATASET_REVISION)
         data_sepid = ds_sepid['train']
         
-        ds_indonlu = load_dataset("indonlu", "smsa", trust_remote_code=True)
+        ds_indonlu = load_dataset(
+            INDONLU_DATASET, INDONLU_CONFIG,
+            revision=settings.INDONLU_DATASET_REVISION,
+            trust_remote_code=True
+        )
         data_indonlu = ds_indonlu['train']
         
         label_names = data_indonlu.features["label"].names
         neutral_label_id = label_names.index("neutral")
-        neutral_data = [item for item in data_indonlu if item["label"] == neutral_label_id]
+        # Column access reads each column once instead of materializing every row as a dict
+        neutral_texts = [
+            text for text, label in zip(data_indonlu['text'], data_indonlu['label'])
+            if label == neutral_label_id
+        ]
         
-        texts = data_sepid['text'] + [item['text'] for item in neutral_data]
-        labels = data_sepid['label'] + ["neutral" for _ in neutral_data]
+        texts = data_sepid['text'] + neutral_texts
+        labels = data_sepid['label'] + ["neutral"] * len(neutral_texts)
         
-        self.label_encoder = LabelEncoder()
-        y = self.label_encoder.fit_transform(labels)
+        label_encoder = LabelEncoder()
+        y = label_encoder.fit_transform(labels)
         
-        self.vectorizer = CountVectorizer(max_features=settings.MAX_FEATURES, stop_words=None)
-        X = self.vectorizer.fit_transform(texts).toarray()
+        # Kept as CSR end to end so memory scales with non-zeros, not vocabulary size.
+        # A hashing vectorizer's fit is a no-op; only a CountVectorizer builds a vocabulary here.
+        vectorizer = build_vectorizer()
+        X = vectorizer.fit_transform(texts)
         print('udah disini')
         print(X.shape)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
         
-        logger.info(f"Data prepared: {X_train.shape[0]} train, {X_test.shape[0]} test samples")
-        return X_train, X_test, y_train, y_test
+        return FeaturizedDataset(X, y, vectorizer, label_encoder)
     
     async def _train_mlp(self, X_train, X_test, y_train, y_test):
         input_size = X_train.shape[1]
@@ -108,36 +284,53 @@ class ModelTrainer:
         logger.info(f"HMM accuracy: {self.hmm_accuracy:.4f}")
     
     def predict_sentiment(self, text: str):
+        return self.predict_sentiment_batch([text])[0]
+    
+    def predict_sentiment_batch(self, texts, timings=None):
+        """Score texts with both models; per-stage seconds are added to timings when given"""
         if not self.training_completed:
             raise ValueError("Models not ready")
         
-        text_vector = self.vectorizer.transform([text]).toarray()
-        
-        mlp_proba = self.mlp_model.predict_proba(text_vector)[0]
-        mlp_pred = np.argmax(mlp_proba)
-        mlp_confidence = float(np.max(mlp_proba))
-        mlp_sentiment = self.label_encoder.inverse_transform([mlp_pred])[0]
-        
-        hmm_proba = self.hmm_model.predict_proba(text_vector)[0]
-        hmm_pred = np.argmax(hmm_proba)
-        hmm_confidence = float(np.max(hmm_proba))
-        hmm_sentiment = self.label_encoder.inverse_transform([hmm_pred])[0]
-        
-        mlp_encoded = self._encode_for_db(mlp_pred)
-        hmm_encoded = self._encode_for_db(hmm_pred)
-        
-        return {
-            "mlp": {
-                "sentiment": mlp_sentiment,
-                "confidence": mlp_confidence,
-                "encoded": mlp_encoded
-            },
-            "hmm": {
-                "sentiment": hmm_sentiment,
-                "confidence": hmm_confidence,
-                "encoded": hmm_encoded
-            }
-        }
+        if not texts:
+            return []
+        
+        started = time.perf_counter()
+        text_vectors = self.vectorizer.transform(texts)
+        vectorized = time.perf_counter()
+        
+        mlp_proba = self.mlp_model.predict_proba(text_vectors)
+        mlp_preds = np.argmax(mlp_proba, axis=1)
+        mlp_confidences = np.max(mlp_proba, axis=1)
+        mlp_sentiments = self.label_encoder.inverse_transform(mlp_preds)
+        mlp_done = time.perf_counter()
+        
+        hmm_proba = self.hmm_model.predict_proba(text_vectors)
+        hmm_preds = np.argmax(hmm_proba, axis=1)
+        hmm_confidences = np.max(hmm_proba, axis=1)
+        hmm_sentiments = self.label_encoder.inverse_transform(hmm_preds)
+        hmm_done = time.perf_counter()
+        
+        if timings is not None:
+            timings["vectorize"] = vectorized - started
+            timings["mlp"] = mlp_done - vectorized
+            timings["hmm"] = hmm_done - mlp_done
+        
+        results = []
+        for i in range(len(texts)):
+            results.append({
+                "mlp": {
+                    "sentiment": mlp_sentiments[i],
+                    "confidence": float(mlp_confidences[i]),
+                    "encoded": self._encode_for_db(mlp_preds[i])
+                },
+                "hmm": {
+                    "sentiment": hmm_sentiments[i],
+                    "confidence": float(hmm_confidences[i]),
+                    "encoded": self._encode_for_db(hmm_preds[i])
+                }
+            })
+        
+        return results
     
     def _encode_for_db(self, sentiment) -> str:
         if sentiment == 1:
@@ -145,4 +338,4 @@ class ModelTrainer:
         elif sentiment == 0:
             return "negatif"
         else:  
-            return sentiment
\ No newline at end of file
+            return "neutral"
\ No newline at end of file
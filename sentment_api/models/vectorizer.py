@@ -0,0 +1,78 @@
+from typing import Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from core.config import settings
+
+VECTORIZER_KINDS = ("count", "hashing")
+
+
+def vectorizer_config() -> dict:
+    """The vectorizer described by the current settings"""
+    ngram_range = [1, max(1, settings.VECTORIZER_NGRAM_MAX)]
+    if settings.VECTORIZER == "hashing":
+        return {"kind": "hashing", "n_features": settings.HASHING_N_FEATURES, "ngram_range": ngram_range}
+    return {"kind": "count", "max_features": settings.MAX_FEATURES, "ngram_range": ngram_range}
+
+
+def build_vectorizer(config: Optional[dict] = None, vocabulary=None):
+    """
+    Vectorizer for config (default: the current settings).
+
+    A hashing vectorizer keeps no state: raw term counts land in a fixed
+    number of columns, so it needs no fit and nothing but its config to be
+    rebuilt. A CountVectorizer is returned fitted when its vocabulary (in
+    column order) is given, unfitted otherwise.
+    """
+    config = config or vectorizer_config()
+    ngram_range = tuple(config.get("ngram_range", (1, 1)))
+
+    if config["kind"] == "hashing":
+        # Non-negative, unnormalized counts, as the HMM's count tables expect
+        return HashingVectorizer(
+            n_features=config["n_features"],
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float64
+        )
+
+    if config["kind"] != "count":
+        raise ValueError(f"Unknown vectorizer kind {config['kind']!r}; expected one of {VECTORIZER_KINDS}")
+
+    vectorizer = CountVectorizer(
+        max_features=config.get("max_features", settings.MAX_FEATURES),
+        ngram_range=ngram_range,
+        stop_words=None,
+        dtype=np.float64,
+        vocabulary=vocabulary
+    )
+    if vocabulary is not None:
+        vectorizer.fit([])
+    return vectorizer
+
+
+def vectorizer_vocabulary(vectorizer) -> Optional[list]:
+    """Fitted vocabulary in column order; None for hashing vectorizers"""
+    vocabulary = getattr(vectorizer, "vocabulary_", None)
+    if vocabulary is None:
+        return None
+    return sorted(vocabulary, key=vocabulary.get)
+
+
+def describe_vectorizer(vectorizer) -> dict:
+    """Config that rebuilds vectorizer with build_vectorizer, plus its output width"""
+    if isinstance(vectorizer, HashingVectorizer):
+        return {
+            "kind": "hashing",
+            "n_features": vectorizer.n_features,
+            "ngram_range": list(vectorizer.ngram_range),
+        }
+
+    vocabulary = getattr(vectorizer, "vocabulary_", None)
+    return {
+        "kind": "count",
+        "max_features": vectorizer.max_features,
+        "ngram_range": list(vectorizer.ngram_range),
+        "n_features": len(vocabulary) if vocabulary is not None else None,
+    }
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Optional, Set
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionBroadcaster:
+    """
+    In-process fan-out of consumer results to stream subscribers.
+
+    publish() never waits: each subscriber has a bounded queue and, when a
+    slow client lets it fill up, the oldest event is dropped for that
+    subscriber only, so the consumer is never held back.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None):
+        self.buffer_size = buffer_size or settings.STREAM_BUFFER_SIZE
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.published_count = 0
+        self.dropped_count = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        self.subscribers.add(queue)
+        logger.info(f"Stream subscriber added ({len(self.subscribers)} active)")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        logger.info(f"Stream subscriber removed ({len(self.subscribers)} active)")
+
+    def publish(self, event: dict):
+        self.published_count += 1
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_count += 1
+            queue.put_nowait(event)
+
+    def get_stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "buffer_size": self.buffer_size,
+            "published_count": self.published_count,
+            "dropped_count": self.dropped_count
+        }
@@ -1,43 +1,101 @@
 import json
+import time
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
 from core.config import settings
-from services.text_cleaner import TextCleaner
 from services.database import DatabaseService
+from services.inference import InferenceExecutor
+from services.broadcast import PredictionBroadcaster
+from services.prediction_sink import PredictionSink
+from core.locks import FileLock, acquire_consumer_slot
+from core.metrics import STAGE_SECONDS, QUEUE_LAG_SECONDS, MESSAGES_TOTAL, MESSAGES_IN_FLIGHT
 
 logger = logging.getLogger(__name__)
 
+# Seconds stop() waits for received messages to be processed and acked
+STOP_DRAIN_TIMEOUT = 10.0
+
 class RabbitMQConsumer:
-    def __init__(self, model_trainer):
+    def __init__(self, model_trainer, inference_executor: Optional[InferenceExecutor] = None,
+                 db_service: Optional[DatabaseService] = None,
+                 broadcaster: Optional[PredictionBroadcaster] = None):
         self.model_trainer = model_trainer
-        self.text_cleaner = TextCleaner()
-        self.db_service = DatabaseService()
+        if inference_executor is None:
+            inference_executor = InferenceExecutor()
+            inference_executor.bind(model_trainer)
+        self.inference = inference_executor
+        self.db_service = db_service or DatabaseService()
+        self.broadcaster = broadcaster
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
         self.processed_count = 0
         self.error_count = 0
         self.running = False
+        self.batch_size = max(1, settings.CONSUMER_BATCH_SIZE)
+        self.batch_timeout = settings.CONSUMER_BATCH_TIMEOUT
+        self.batch_queue: Optional[asyncio.Queue] = None
+        self.batch_task: Optional[asyncio.Task] = None
+        self.consumer_slot: Optional[FileLock] = None
+        self.queue = None
+        self.consumer_tag: Optional[str] = None
+        self.in_flight = 0
+        self.prediction_sink: Optional[PredictionSink] = None
+        if settings.DB_SINK_BATCH_SIZE > 1:
+            self.prediction_sink = PredictionSink(self.db_service)
     
     async def connect(self):
         try:
             self.connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=1)
+            await self.channel.set_qos(prefetch_count=self.prefetch_count(settings.CONSUMER_PREFETCH_COUNT))
             logger.info("Connected to RabbitMQ")
         except Exception as e:
             logger.error(f"RabbitMQ connection failed: {e}")
             raise
     
+    def prefetch_count(self, requested: int) -> int:
+        """
+        requested, raised so a full consumer batch and a full sink batch can be
+        in flight: messages are acked only once their prediction is written, so
+        with less prefetch than DB_SINK_BATCH_SIZE every sink flush would wait
+        out DB_SINK_FLUSH_INTERVAL
+        """
+        prefetch_count = max(requested, self.batch_size)
+        if self.prediction_sink is not None:
+            prefetch_count = max(prefetch_count, self.prediction_sink.max_batch)
+        return prefetch_count
+    
+    def _models_ready(self) -> bool:
+        # model_trainer is swapped in by the model manager once loaded
+        return self.model_trainer is not None and self.model_trainer.training_completed
+    
+    async def _acquire_slot(self):
+        """Block until this process holds one of the CONSUMER_SLOTS consumer locks"""
+        logger.info(f"Waiting for one of {settings.CONSUMER_SLOTS} consumer slots")
+        while self.consumer_slot is None:
+            self.consumer_slot = acquire_consumer_slot(settings.CONSUMER_SLOTS)
+            if self.consumer_slot is None:
+                await asyncio.sleep(settings.CONSUMER_SLOT_RETRY_SECONDS)
+        logger.info(f"Acquired consumer slot {self.consumer_slot.path.name}")
+    
+    def _release_slot(self):
+        if self.consumer_slot is not None:
+            self.consumer_slot.release()
+            self.consumer_slot = None
+    
     async def start_consuming(self):
-        if not self.model_trainer.training_completed:
+        if not self._models_ready():
             logger.info("Waiting for models to complete training")
-            while not self.model_trainer.training_completed:
+            while not self._models_ready():
                 await asyncio.sleep(1)
         
+        if settings.CONSUMER_SLOTS > 0:
+            await self._acquire_slot()
+        
         await self.connect()
         await self.db_service.connect()
         
@@ -50,7 +108,14 @@ class RabbitMQConsumer:
             logger.info(f"Started consuming from queue: {settings.QUEUE_NAME}")
             self.running = True
             
-            await queue.consume(self.process_message)
+            if self.batch_size > 1:
+                logger.info(f"Batching enabled: size={self.batch_size}, timeout={self.batch_timeout}s")
+                self.batch_queue = asyncio.Queue()
+                self.batch_task = asyncio.create_task(self._batch_loop())
+                self.consumer_tag = await queue.consume(self.enqueue_message)
+            else:
+                self.consumer_tag = await queue.consume(self.process_message)
+            self.queue = queue
             
             while self.running:
                 await asyncio.sleep(1)
@@ -59,69 +124,255 @@ class RabbitMQConsumer:
             logger.error(f"Consumer error: {e}")
             self.running = False
         finally:
+            if self.batch_task:
+                self.batch_task.cancel()
             if self.connection:
                 await self.connection.close()
             await self.db_service.close()
+            self._release_slot()
+    
+    def _observe_queue_lag(self, message: AbstractIncomingMessage):
+        published_at = message.timestamp
+        if published_at is None:
+            return
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=timezone.utc)
+        lag = (datetime.now(timezone.utc) - published_at).total_seconds()
+        QUEUE_LAG_SECONDS.observe(max(lag, 0.0))
+    
+    def _parse_message(self, message: AbstractIncomingMessage):
+        self._observe_queue_lag(message)
+        
+        started = time.perf_counter()
+        body = message.body.decode('utf-8')
+        data = json.loads(body)
+        STAGE_SECONDS.labels("decode").observe(time.perf_counter() - started)
+        
+        url = data.get('url', '')
+        content = data.get('content', '')
+        
+        if not url or not content:
+            logger.warning(f"Invalid message format: {data}")
+            MESSAGES_TOTAL.labels("skipped").inc()
+            return None
+        
+        return url, content
+    
+    async def _save_and_ack(self, message: AbstractIncomingMessage, url: str, cleaned_content: str, predictions,
+                            model_version: Optional[str]):
+        started = time.perf_counter()
+        if self.prediction_sink:
+            # Returns once the batched UPDATE holding this row has committed
+            await self.prediction_sink.submit(
+                url,
+                predictions['mlp']['encoded'],
+                predictions['hmm']['encoded'],
+                model_version
+            )
+        else:
+            await self.db_service.save_prediction(
+                url=url,
+                content=cleaned_content,
+                mlp_label=predictions['mlp']['encoded'],
+                hmm_label=predictions['hmm']['encoded'],
+                model_version=model_version
+            )
+        STAGE_SECONDS.labels("save").observe(time.perf_counter() - started)
+        
+        result = {
+            "url": url,
+            "predictions": predictions,
+            "processed_at": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Processed: {url}")
+        logger.info(f"MLP: {predictions['mlp']['sentiment']} ({predictions['mlp']['encoded']})")
+        logger.info(f"HMM: {predictions['hmm']['sentiment']} ({predictions['hmm']['encoded']})")
+        
+        self.processed_count += 1
+        MESSAGES_TOTAL.labels("processed").inc()
+        await message.ack()
+        
+        if self.broadcaster:
+            self.broadcaster.publish(result)
+        return result
+    
+    def _count_errors(self, count: int):
+        self.error_count += count
+        MESSAGES_TOTAL.labels("error").inc(count)
     
     async def process_message(self, message: AbstractIncomingMessage):
+        self._track_in_flight(1)
         try:
-            body = message.body.decode('utf-8')
-            data = json.loads(body)
-            
-            url = data.get('url', '')
-            content = data.get('content', '')
-            
-            if not url or not content:
-                logger.warning(f"Invalid message format: {data}")
+            parsed = self._parse_message(message)
+            if parsed is None:
                 await message.ack()
                 return
             
+            url, content = parsed
             logger.info(f"Processing article: {url}")
             
-            cleaned_content = self.text_cleaner.clean(content)
+            cleaned_content = (await self.inference.clean([content]))[0]
             
             if not cleaned_content.strip():
                 logger.warning(f"No content after cleaning: {url}")
+                MESSAGES_TOTAL.labels("skipped").inc()
                 await message.ack()
                 return
             
-            predictions = self.model_trainer.predict_sentiment(cleaned_content)
-            
-            await self.db_service.save_prediction(
-                url=url,
-                content=cleaned_content,
-                mlp_label=predictions['mlp']['encoded'],
-                hmm_label=predictions['hmm']['encoded']
-            )
+            predictions, model_version = await self.inference.predict([cleaned_content])
             
-            result = {
-                "url": url,
-                "predictions": predictions,
-                "processed_at": datetime.now().isoformat()
-            }
+            await self._save_and_ack(message, url, cleaned_content, predictions[0], model_version)
             
-            logger.info(f"Processed: {url}")
-            logger.info(f"MLP: {predictions['mlp']['sentiment']} ({predictions['mlp']['encoded']})")
-            logger.info(f"HMM: {predictions['hmm']['sentiment']} ({predictions['hmm']['encoded']})")
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            self._count_errors(1)
+            await message.nack(requeue=False)
+        finally:
+            self._track_in_flight(-1)
+    
+    async def enqueue_message(self, message: AbstractIncomingMessage):
+        self._track_in_flight(1)
+        await self.batch_queue.put(message)
+    
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self.batch_queue.get()]
+            deadline = loop.time() + self.batch_timeout
             
-            self.processed_count += 1
-            await message.ack()
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
             
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                logger.error(f"Batch processing error: {e}")
+            finally:
+                self._track_in_flight(-len(batch))
+    
+    async def process_batch(self, messages):
+        """Clean and score a batch of messages together, acking each one on its own outcome"""
+        parsed_messages = []
+        
+        for message in messages:
+            try:
+                parsed = self._parse_message(message)
+                if parsed is None:
+                    await message.ack()
+                    continue
+                
+                url, content = parsed
+                logger.info(f"Processing article: {url}")
+                parsed_messages.append((message, url, content))
+                
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                self._count_errors(1)
+                await message.nack(requeue=False)
+        
+        if not parsed_messages:
+            return
+        
+        try:
+            cleaned_contents = await self.inference.clean(
+                [content for _, _, content in parsed_messages]
+            )
+        except Exception as e:
+            logger.error(f"Error cleaning batch of {len(parsed_messages)}: {e}")
+            self._count_errors(len(parsed_messages))
+            for message, _, _ in parsed_messages:
+                await message.nack(requeue=False)
+            return
+        
+        pending = []
+        for (message, url, _), cleaned_content in zip(parsed_messages, cleaned_contents):
+            if not cleaned_content.strip():
+                logger.warning(f"No content after cleaning: {url}")
+                MESSAGES_TOTAL.labels("skipped").inc()
+                await message.ack()
+                continue
+            pending.append((message, url, cleaned_content))
+        
+        if not pending:
+            return
+        
+        try:
+            batch_predictions, model_version = await self.inference.predict(
+                [cleaned_content for _, _, cleaned_content in pending]
+            )
+        except Exception as e:
+            logger.error(f"Error predicting batch of {len(pending)}: {e}")
+            self._count_errors(len(pending))
+            for message, _, _ in pending:
+                await message.nack(requeue=False)
+            return
+        
+        # Saved concurrently so a write-behind sink can put the whole batch in one UPDATE
+        await asyncio.gather(*(
+            self._save_and_ack_or_nack(message, url, cleaned_content, predictions, model_version)
+            for (message, url, cleaned_content), predictions in zip(pending, batch_predictions)
+        ))
+    
+    async def _save_and_ack_or_nack(self, message: AbstractIncomingMessage, url: str, cleaned_content: str, predictions,
+                                    model_version: Optional[str]):
+        try:
+            await self._save_and_ack(message, url, cleaned_content, predictions, model_version)
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            self.error_count += 1
+            self._count_errors(1)
             await message.nack(requeue=False)
     
+    def _track_in_flight(self, delta: int):
+        self.in_flight += delta
+        MESSAGES_IN_FLIGHT.inc(delta)
+    
+    async def _drain_in_flight(self, timeout: float):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.in_flight > 0 and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        if self.in_flight > 0:
+            logger.warning(f"Stopping with {self.in_flight} messages still in flight; they will be redelivered")
+    
     async def stop(self):
         logger.info("Stopping consumer")
+        
+        # Stop deliveries, let messages already received finish and have their
+        # buffered predictions flushed, and only then close the channel they ack on
+        if self.queue is not None and self.consumer_tag is not None:
+            try:
+                await self.queue.cancel(self.consumer_tag)
+            except Exception as e:
+                logger.warning(f"Failed to cancel consumer: {e}")
+            self.consumer_tag = None
+            await self._drain_in_flight(STOP_DRAIN_TIMEOUT)
+        
+        if self.prediction_sink:
+            await self.prediction_sink.stop()
+        
         self.running = False
+        if self.batch_task:
+            self.batch_task.cancel()
         if self.connection:
             await self.connection.close()
         await self.db_service.close()
+        self._release_slot()
     
     def get_stats(self):
         return {
             "processed_count": self.processed_count,
             "error_count": self.error_count,
-            "running": self.running
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "consumer_slot": self.consumer_slot.path.name if self.consumer_slot else None,
+            "in_flight": self.in_flight,
+            "sink": self.prediction_sink.get_stats() if self.prediction_sink else None
         }
\ No newline at end of file
@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from typing import Dict, Optional
+from core.config import settings
+from core.metrics import add_forwarded_source, remove_forwarded_source, snapshot_metrics
+from models.artifacts import ModelArtifactStore
+from services.broadcast import PredictionBroadcaster
+from services.consumer import RabbitMQConsumer
+from services.database import DatabaseService
+from services.inference import InferenceExecutor, load_version
+from services.prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between supervisor health checks
+MONITOR_INTERVAL = 1.0
+# Seconds a worker gets to finish after SIGTERM before it is killed
+WORKER_STOP_TIMEOUT = 10.0
+# A worker that stays up this long resets its restart backoff
+WORKER_STABLE_SECONDS = 60.0
+# Seconds the event forwarder waits on the events queue before rechecking subscribers
+EVENT_POLL_INTERVAL = 0.5
+# Room for the artifact version workers are told to switch to
+MODEL_VERSION_BYTES = 256
+
+
+class _ForwardingBroadcaster:
+    """
+    Stands in for the PredictionBroadcaster inside a worker process: events
+    go to the supervisor, which publishes them to the API's stream
+    subscribers. Nothing is sent while nobody is subscribed, and an event
+    is dropped rather than waited on when the queue is full.
+    """
+
+    def __init__(self, events_queue, streaming):
+        self.events_queue = events_queue
+        self.streaming = streaming
+
+    def publish(self, event: dict):
+        if not self.streaming.is_set():
+            return
+        try:
+            self.events_queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+
+def _report(stats_queue, index: int, consumer):
+    stats = consumer.get_stats()
+    stats["model_version"] = consumer.model_trainer.model_version
+    try:
+        stats_queue.put_nowait((index, os.getpid(), stats, snapshot_metrics()))
+    except queue.Full:
+        pass
+
+
+def _run_worker(index: int, model_version: Optional[str], model_trainer, stats_queue, events_queue, streaming,
+                current_version):
+    """Entry point of a consumer process"""
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_worker_main(
+        index, model_version, model_trainer, stats_queue, events_queue, streaming, current_version
+    )))
+
+
+async def _worker_main(index: int, model_version: Optional[str], model_trainer,
+                       stats_queue, events_queue, streaming, current_version) -> int:
+    if model_version is not None:
+        model_trainer = load_version(model_version)
+
+    cache = PredictionCache()
+    await cache.connect()
+    inference_executor = InferenceExecutor(kind="thread", cache=cache)
+    inference_executor.bind(model_trainer)
+
+    consumer = RabbitMQConsumer(
+        model_trainer,
+        inference_executor,
+        DatabaseService(),
+        _ForwardingBroadcaster(events_queue, streaming)
+    )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+
+    consumer_task = asyncio.create_task(consumer.start_consuming())
+    logger.info(f"Consumer worker {index} started (pid {os.getpid()}, model {model_trainer.model_version})")
+
+    while not stopping.is_set() and not consumer_task.done():
+        wanted = current_version.value.decode("utf-8")
+        if wanted and wanted != consumer.model_trainer.model_version:
+            # A saved model was swapped in (e.g. after /feedback); switch without a restart
+            try:
+                model_trainer = await loop.run_in_executor(None, load_version, wanted)
+                inference_executor.bind(model_trainer)
+                consumer.model_trainer = model_trainer
+                logger.info(f"Consumer worker {index} switched to model {wanted}")
+            except Exception as e:
+                logger.error(f"Consumer worker {index} failed to load model {wanted}: {e}")
+
+        _report(stats_queue, index, consumer)
+        try:
+            await asyncio.wait_for(stopping.wait(), settings.CONSUMER_STATS_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+    crashed = consumer_task.done() and not stopping.is_set()
+
+    await consumer.stop()
+    consumer_task.cancel()
+    inference_executor.shutdown()
+    await cache.close()
+
+    _report(stats_queue, index, consumer)
+
+    # start_consuming only returns on its own when the connection failed
+    return 1 if crashed else 0
+
+
+class ConsumerWorker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.model_trainer = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.next_start_at = 0.0
+        self.stats: dict = {}
+        # Latest snapshot of the worker's Prometheus metrics
+        self.metrics: dict = {}
+        # Counts from previous incarnations of this slot, so totals survive restarts
+        self.retired_processed = 0
+        self.retired_errors = 0
+        self.retired_metrics: dict = {}
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def retire_stats(self):
+        self.retired_processed += self.stats.get("processed_count", 0)
+        self.retired_errors += self.stats.get("error_count", 0)
+        self.stats = {}
+        # Counters and histograms keep accumulating; a dead worker's gauges are gone
+        for key, value in self.metrics.items():
+            if key[1] != "gauge":
+                self.retired_metrics[key] = self.retired_metrics.get(key, 0.0) + value
+        self.metrics = {}
+
+
+class ConsumerSupervisor:
+    """
+    Runs CONSUMER_PROCESSES RabbitMQConsumer processes in place of the
+    in-process consumer, each with its own aio_pika connection, channel and
+    prefetch on QUEUE_NAME, so cleaning and inference scale past one GIL.
+
+    Workers load the same model snapshot (memory-mapping the artifact when
+    the model has been saved), report stats over a queue, are restarted with
+    exponential backoff when they die, and switch to a new model when
+    model_trainer is swapped: running workers load a saved artifact
+    themselves, and are only rolled one at a time onto a model that is not
+    on disk. Workers' prediction events are relayed to broadcaster and their
+    Prometheus metrics are added into this process's /metrics/prometheus
+    output. Exposes the same
+    start_consuming / stop / get_stats surface as RabbitMQConsumer.
+    """
+
+    def __init__(self, model_trainer=None, processes: Optional[int] = None,
+                 broadcaster: Optional[PredictionBroadcaster] = None):
+        self.model_trainer = model_trainer
+        self.processes = processes or settings.CONSUMER_PROCESSES
+        self.broadcaster = broadcaster
+        self.context = multiprocessing.get_context("spawn")
+        self.stats_queue = self.context.Queue(maxsize=1000)
+        self.events_queue = self.context.Queue(maxsize=1000)
+        # Set while the API has stream subscribers, so idle workers send no events
+        self.streaming = self.context.Event()
+        # Saved artifact running workers switch to; empty while the model is not on disk
+        self.current_version = self.context.Array("c", MODEL_VERSION_BYTES)
+        self.published_trainer = None
+        self.workers: Dict[int, ConsumerWorker] = {
+            index: ConsumerWorker(index) for index in range(self.processes)
+        }
+        self.running = False
+
+    def _models_ready(self) -> bool:
+        return self.model_trainer is not None and self.model_trainer.training_completed
+
+    def _spawn(self, worker: ConsumerWorker):
+        model_trainer = self.model_trainer
+        model_version = model_trainer.model_version
+        if not (model_version and ModelArtifactStore().has_version(model_version)):
+            model_version = None
+
+        worker.process = self.context.Process(
+            target=_run_worker,
+            args=(
+                worker.index,
+                model_version,
+                None if model_version else model_trainer,
+                self.stats_queue,
+                self.events_queue,
+                self.streaming,
+                self.current_version
+            ),
+            name=f"consumer-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+        worker.model_trainer = model_trainer
+        worker.started_at = time.monotonic()
+        logger.info(f"Started consumer worker {worker.index} (pid {worker.process.pid})")
+
+    async def _terminate(self, worker: ConsumerWorker):
+        process = worker.process
+        if process is None:
+            return
+
+        if process.is_alive():
+            process.terminate()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Consumer worker {worker.index} did not stop, killing")
+                process.kill()
+                await loop.run_in_executor(None, process.join)
+
+        # Pick up the final stats the worker sent on its way out
+        self._drain_stats()
+        process.close()
+        worker.process = None
+
+    def _drain_stats(self):
+        while True:
+            try:
+                index, pid, stats, metrics = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            worker = self.workers.get(index)
+            if worker and worker.process is not None and worker.process.pid == pid:
+                worker.stats = stats
+                worker.metrics = metrics
+
+    def forwarded_metrics(self) -> dict:
+        """Workers' Prometheus samples summed across processes, including restarted ones"""
+        totals = {}
+        for worker in self.workers.values():
+            for snapshot in (worker.retired_metrics, worker.metrics):
+                for key, value in snapshot.items():
+                    totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    async def _forward_events(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            if self.broadcaster.subscribers:
+                self.streaming.set()
+            else:
+                self.streaming.clear()
+
+            try:
+                event = await loop.run_in_executor(None, self.events_queue.get, True, EVENT_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            self.broadcaster.publish(event)
+            # Publish whatever else arrived without another thread hop per event
+            while True:
+                try:
+                    self.broadcaster.publish(self.events_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+    def _publish_version(self) -> bool:
+        """Offer the current model to running workers; False when it is not on disk and they must be respawned"""
+        model_trainer = self.model_trainer
+        if self.published_trainer is not model_trainer:
+            version = model_trainer.model_version or ""
+            if not (version and ModelArtifactStore().has_version(version)) or len(version) >= MODEL_VERSION_BYTES:
+                version = ""
+            self.current_version.value = version.encode("utf-8")
+            self.published_trainer = model_trainer
+        return bool(self.current_version.value)
+
+    async def _check_workers(self):
+        now = time.monotonic()
+        rolled = False
+        saved = self._publish_version()
+
+        for worker in self.workers.values():
+            if worker.process is not None and not worker.alive:
+                exit_code = worker.process.exitcode
+                uptime = now - worker.started_at
+                worker.process.close()
+                worker.process = None
+                worker.retire_stats()
+                worker.restarts += 1
+                worker.consecutive_failures = 1 if uptime >= WORKER_STABLE_SECONDS else worker.consecutive_failures + 1
+                backoff = min(2 ** (worker.consecutive_failures - 1), settings.CONSUMER_RESTART_BACKOFF_MAX)
+                worker.next_start_at = now + backoff
+                logger.error(f"Consumer worker {worker.index} exited with code {exit_code}, restarting in {backoff}s")
+
+            if worker.process is None and now >= worker.next_start_at:
+                self._spawn(worker)
+            elif worker.alive and worker.model_trainer is not self.model_trainer and saved:
+                # Loads the artifact on its next stats tick
+                worker.model_trainer = self.model_trainer
+            elif worker.alive and worker.model_trainer is not self.model_trainer and not rolled:
+                # Roll one worker per check so the rest keep consuming during a swap
+                logger.info(f"Rolling consumer worker {worker.index} onto model {self.model_trainer.model_version}")
+                await self._terminate(worker)
+                worker.retire_stats()
+                self._spawn(worker)
+                rolled = True
+
+    async def start_consuming(self):
+        if not self._models_ready():
+            logger.info("Waiting for models to complete training")
+            while not self._models_ready():
+                await asyncio.sleep(1)
+
+        logger.info(f"Starting {self.processes} consumer processes on queue: {settings.QUEUE_NAME}")
+        self.running = True
+        add_forwarded_source(self.forwarded_metrics)
+        forward_task = asyncio.create_task(self._forward_events()) if self.broadcaster else None
+
+        try:
+            while self.running:
+                self._drain_stats()
+                await self._check_workers()
+                await asyncio.sleep(MONITOR_INTERVAL)
+        finally:
+            self.streaming.clear()
+            if forward_task:
+                forward_task.cancel()
+            await self._stop_workers()
+            remove_forwarded_source(self.forwarded_metrics)
+
+    async def _stop_workers(self):
+        await asyncio.gather(*(self._terminate(worker) for worker in self.workers.values()))
+
+    async def stop(self):
+        logger.info("Stopping consumer processes")
+        self.running = False
+        await self._stop_workers()
+
+    def get_stats(self):
+        workers = []
+        for worker in self.workers.values():
+            workers.append({
+                "index": worker.index,
+                "pid": worker.process.pid if worker.process is not None else None,
+                "alive": worker.alive,
+                "restarts": worker.restarts,
+                "model_version": worker.stats.get("model_version") or (
+                    worker.model_trainer.model_version if worker.model_trainer else None
+                ),
+                "processed_count": worker.retired_processed + worker.stats.get("processed_count", 0),
+                "error_count": worker.retired_errors + worker.stats.get("error_count", 0),
+                "running": worker.stats.get("running", False)
+            })
+
+        return {
+            "processed_count": sum(w["processed_count"] for w in workers),
+            "error_count": sum(w["error_count"] for w in workers),
+            "running": self.running and any(w["running"] for w in workers),
+            "processes": self.processes,
+            "alive": sum(1 for w in workers if w["alive"]),
+            "restarts": sum(w["restarts"] for w in workers),
+            "workers": workers
+        }
@@ -1,38 +1,474 @@
 import asyncpg
 import logging
+from datetime import datetime, timezone
+from typing import Optional
 from core.config import settings
+from services.search import search_ts_config
 
 logger = logging.getLogger(__name__)
 
+# Serializes schema migrations when several processes start at once
+MIGRATION_LOCK_ID = 727001
+
+# Single-row summary of the articles table, kept exact by statement triggers so
+# the stats endpoints never scan articles. Predictions written by save_prediction,
+# inserts from the Go producer and any manual edits all go through them. Each
+# statement applies one delta aggregated from its transition tables, so a bulk
+# write touches the summary row once rather than once per article.
+ARTICLE_STATS_MIGRATION = """
+CREATE TABLE IF NOT EXISTS article_stats (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_articles BIGINT NOT NULL DEFAULT 0,
+    with_title BIGINT NOT NULL DEFAULT 0,
+    with_images BIGINT NOT NULL DEFAULT 0,
+    hmm_analyzed BIGINT NOT NULL DEFAULT 0,
+    mlp_analyzed BIGINT NOT NULL DEFAULT 0,
+    both_analyzed BIGINT NOT NULL DEFAULT 0,
+    hmm_positive BIGINT NOT NULL DEFAULT 0,
+    hmm_negative BIGINT NOT NULL DEFAULT 0,
+    hmm_neutral BIGINT NOT NULL DEFAULT 0,
+    mlp_positive BIGINT NOT NULL DEFAULT 0,
+    mlp_negative BIGINT NOT NULL DEFAULT 0,
+    mlp_neutral BIGINT NOT NULL DEFAULT 0,
+    agree BIGINT NOT NULL DEFAULT 0,
+    disagree BIGINT NOT NULL DEFAULT 0,
+    partial BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION article_stats_on_statement() RETURNS TRIGGER AS $$
+DECLARE
+    changed TEXT;
+BEGIN
+    -- Transition tables only exist for the events that declare them, so the
+    -- source rows are picked per event and the aggregate below is shared
+    IF TG_OP = 'INSERT' THEN
+        changed := 'SELECT title, img, hmm, mlp, 1::bigint AS delta FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        changed := 'SELECT title, img, hmm, mlp, -1::bigint AS delta FROM old_rows';
+    ELSE
+        -- Rows whose counted columns are unchanged would add and remove the same values
+        changed := '
+            WITH moved AS (
+                SELECT n.title AS new_title, n.img AS new_img, n.hmm AS new_hmm, n.mlp AS new_mlp,
+                       o.title AS old_title, o.img AS old_img, o.hmm AS old_hmm, o.mlp AS old_mlp
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE (n.title, n.img, n.hmm, n.mlp) IS DISTINCT FROM (o.title, o.img, o.hmm, o.mlp)
+            )
+            SELECT new_title, new_img, new_hmm, new_mlp, 1::bigint FROM moved
+            UNION ALL
+            SELECT old_title, old_img, old_hmm, old_mlp, -1::bigint FROM moved';
+    END IF;
+
+    -- HAVING drops the empty aggregate, so a statement that changed nothing
+    -- counted never takes the summary row lock
+    EXECUTE format($q$
+        WITH d AS (
+            SELECT
+                SUM(delta) AS total_articles,
+                SUM(CASE WHEN title IS NOT NULL AND title != '' THEN delta ELSE 0 END) AS with_title,
+                SUM(CASE WHEN img IS NOT NULL AND img != '' THEN delta ELSE 0 END) AS with_images,
+                SUM(CASE WHEN hmm IS NOT NULL THEN delta ELSE 0 END) AS hmm_analyzed,
+                SUM(CASE WHEN mlp IS NOT NULL THEN delta ELSE 0 END) AS mlp_analyzed,
+                SUM(CASE WHEN hmm IS NOT NULL AND mlp IS NOT NULL THEN delta ELSE 0 END) AS both_analyzed,
+                SUM(CASE WHEN hmm = 'positive' THEN delta ELSE 0 END) AS hmm_positive,
+                SUM(CASE WHEN hmm = 'negative' THEN delta ELSE 0 END) AS hmm_negative,
+                SUM(CASE WHEN hmm = 'neutral' THEN delta ELSE 0 END) AS hmm_neutral,
+                SUM(CASE WHEN mlp = 'positive' THEN delta ELSE 0 END) AS mlp_positive,
+                SUM(CASE WHEN mlp = 'negative' THEN delta ELSE 0 END) AS mlp_negative,
+                SUM(CASE WHEN mlp = 'neutral' THEN delta ELSE 0 END) AS mlp_neutral,
+                SUM(CASE WHEN hmm = mlp THEN delta ELSE 0 END) AS agree,
+                SUM(CASE WHEN hmm != mlp THEN delta ELSE 0 END) AS disagree,
+                SUM(CASE WHEN (hmm IS NULL) != (mlp IS NULL) THEN delta ELSE 0 END) AS partial
+            FROM (%s) AS changed (title, img, hmm, mlp, delta)
+            HAVING COUNT(*) > 0
+        )
+        UPDATE article_stats s SET
+            total_articles = s.total_articles + d.total_articles,
+            with_title = s.with_title + d.with_title,
+            with_images = s.with_images + d.with_images,
+            hmm_analyzed = s.hmm_analyzed + d.hmm_analyzed,
+            mlp_analyzed = s.mlp_analyzed + d.mlp_analyzed,
+            both_analyzed = s.both_analyzed + d.both_analyzed,
+            hmm_positive = s.hmm_positive + d.hmm_positive,
+            hmm_negative = s.hmm_negative + d.hmm_negative,
+            hmm_neutral = s.hmm_neutral + d.hmm_neutral,
+            mlp_positive = s.mlp_positive + d.mlp_positive,
+            mlp_negative = s.mlp_negative + d.mlp_negative,
+            mlp_neutral = s.mlp_neutral + d.mlp_neutral,
+            agree = s.agree + d.agree,
+            disagree = s.disagree + d.disagree,
+            partial = s.partial + d.partial
+        FROM d
+        WHERE s.id = 1
+    $q$, changed);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creating a trigger locks articles against writes, so it only happens once;
+-- later changes go into the function above, which replaces without a table lock.
+-- The per-row triggers of earlier versions are swapped out in the same transaction.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_trigger
+               WHERE tgrelid = 'articles'::regclass
+                 AND tgname IN ('article_stats_insert_delete', 'article_stats_update')
+                 AND tgtype & 1 = 1) THEN
+        DROP TRIGGER IF EXISTS article_stats_insert_delete ON articles;
+        DROP TRIGGER IF EXISTS article_stats_update ON articles;
+        DROP FUNCTION IF EXISTS article_stats_on_change();
+        DROP FUNCTION IF EXISTS article_stats_add(TEXT, TEXT, TEXT, TEXT, BIGINT);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                   WHERE tgrelid = 'articles'::regclass AND tgname = 'article_stats_insert') THEN
+        CREATE TRIGGER article_stats_insert
+            AFTER INSERT ON articles
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION article_stats_on_statement();
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                   WHERE tgrelid = 'articles'::regclass AND tgname = 'article_stats_delete') THEN
+        CREATE TRIGGER article_stats_delete
+            AFTER DELETE ON articles
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION article_stats_on_statement();
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                   WHERE tgrelid = 'articles'::regclass AND tgname = 'article_stats_update') THEN
+        CREATE TRIGGER article_stats_update
+            AFTER UPDATE ON articles
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION article_stats_on_statement();
+    END IF;
+END;
+$$;
+"""
+
+# Full recount used to (re)build the summary row; runs with writers locked out
+# so no trigger delta is lost between the scan and the row write
+ARTICLE_STATS_REBUILD = """
+LOCK TABLE articles IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM article_stats;
+INSERT INTO article_stats
+SELECT 
+    1,
+    COUNT(*),
+    COUNT(CASE WHEN title IS NOT NULL AND title != '' THEN 1 END),
+    COUNT(CASE WHEN img IS NOT NULL AND img != '' THEN 1 END),
+    COUNT(CASE WHEN hmm IS NOT NULL THEN 1 END),
+    COUNT(CASE WHEN mlp IS NOT NULL THEN 1 END),
+    COUNT(CASE WHEN hmm IS NOT NULL AND mlp IS NOT NULL THEN 1 END),
+    COUNT(CASE WHEN hmm = 'positive' THEN 1 END),
+    COUNT(CASE WHEN hmm = 'negative' THEN 1 END),
+    COUNT(CASE WHEN hmm = 'neutral' THEN 1 END),
+    COUNT(CASE WHEN mlp = 'positive' THEN 1 END),
+    COUNT(CASE WHEN mlp = 'negative' THEN 1 END),
+    COUNT(CASE WHEN mlp = 'neutral' THEN 1 END),
+    COUNT(CASE WHEN hmm = mlp AND hmm IS NOT NULL AND mlp IS NOT NULL THEN 1 END),
+    COUNT(CASE WHEN hmm != mlp AND hmm IS NOT NULL AND mlp IS NOT NULL THEN 1 END),
+    COUNT(CASE WHEN (hmm IS NULL AND mlp IS NOT NULL) OR (hmm IS NOT NULL AND mlp IS NULL) THEN 1 END)
+FROM articles;
+"""
+
+# Full-text search over title (weight A) and content (weight B). A row trigger
+# keeps search_vector current, so rows written by the Go producer are indexed
+# without app changes. Only cheap catalog changes run at startup: the column is
+# nullable (no table rewrite) and each DDL is skipped once in place. Existing
+# rows are backfilled and the GIN index built concurrently by tools/migrate.py.
+# A search_vector left GENERATED by an older deployment is kept as it is.
+SEARCH_MIGRATION = """
+CREATE OR REPLACE FUNCTION articles_search_document(title TEXT, content TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('{ts_config}', coalesce(title, '')), 'A') ||
+           setweight(to_tsvector('{ts_config}', coalesce(content, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION articles_search_vector_on_change() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := articles_search_document(NEW.title, NEW.content);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_attribute
+                   WHERE attrelid = 'articles'::regclass AND attname = 'search_vector' AND NOT attisdropped) THEN
+        ALTER TABLE articles ADD COLUMN search_vector tsvector;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_attribute
+                   WHERE attrelid = 'articles'::regclass AND attname = 'search_vector' AND attgenerated = 's')
+       AND NOT EXISTS (SELECT 1 FROM pg_trigger
+                       WHERE tgrelid = 'articles'::regclass AND tgname = 'articles_search_vector') THEN
+        CREATE TRIGGER articles_search_vector
+            BEFORE INSERT OR UPDATE OF title, content ON articles
+            FOR EACH ROW EXECUTE FUNCTION articles_search_vector_on_change();
+    END IF;
+END;
+$$;
+"""
+
+# Built with CREATE INDEX CONCURRENTLY by tools/migrate.py, never at startup
+SEARCH_INDEXES = [
+    ("articles_search_vector_idx", "ON articles USING gin (search_vector)"),
+    ("articles_title_trgm_idx", "ON articles USING gin (title gin_trgm_ops)"),
+]
+
+# pg_trgm backs the ILIKE fallback for queries made only of stopwords or
+# punctuation (articles_title_trgm_idx); it is optional
+TRIGRAM_MIGRATION = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+"""
+
+# Corrected labels submitted through /feedback. Every submission is kept, whether
+# or not it could be applied to the live models, so it can feed a later retrain.
+FEEDBACK_MIGRATION = """
+CREATE TABLE IF NOT EXISTS sentiment_feedback (
+    id BIGSERIAL PRIMARY KEY,
+    article_id INT NOT NULL,
+    url TEXT,
+    label TEXT NOT NULL,
+    applied BOOLEAN NOT NULL DEFAULT FALSE,
+    model_version TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS sentiment_feedback_article_id_idx ON sentiment_feedback (article_id);
+"""
+
+# Version of the model behind each row's mlp/hmm labels, so rows scored by an
+# older model can be found and rescored (see tools/backfill.py). Checked in the
+# catalog first, since even a no-op ALTER TABLE waits for an exclusive lock.
+PREDICTION_VERSION_MIGRATION = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_attribute
+                   WHERE attrelid = 'articles'::regclass AND attname = 'model_version' AND NOT attisdropped) THEN
+        ALTER TABLE articles ADD COLUMN model_version TEXT;
+    END IF;
+END;
+$$;
+"""
+
+def to_published_at(value: Optional[datetime]) -> Optional[datetime]:
+    """published_at is a naive UTC timestamp; convert an aware bound to it, naive ones are taken as UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def create_db_pool():
+    # asyncpg prepares and caches each distinct query text per connection, so
+    # the fixed route and consumer queries are parsed/planned once per connection
+    return await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        command_timeout=settings.DB_COMMAND_TIMEOUT
+    )
+
 class DatabaseService:
-    def __init__(self):
-        self.pool = None
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.owns_pool = pool is None
     
     async def connect(self):
         try:
-            self.pool = await asyncpg.create_pool(settings.DATABASE_URL)
-            await self.create_table()
+            if self.pool is None:
+                self.pool = await create_db_pool()
+                self.owns_pool = True
+            # Schema migrations run once from the API lifespan (create_table), not
+            # from every consumer process that connects
             logger.info("Connected to PostgreSQL")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
     async def create_table(self):
-        pass  
+        await self.migrate_article_stats()
+        await self.migrate_search()
+        await self.migrate_feedback()
+        await self.migrate_prediction_version()
+    
+    async def migrate_search(self):
+        """Add the search_vector column and trigger behind /news/search; indexes come from tools/migrate.py"""
+        migrations = [
+            ("search_vector", SEARCH_MIGRATION.format(ts_config=search_ts_config())),
+            ("pg_trgm", TRIGRAM_MIGRATION)
+        ]
+        for name, migration in migrations:
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                        await conn.execute(migration)
+            except Exception as e:
+                logger.error(f"{name} search migration failed: {e}")
+    
+    async def backfill_search_vectors(self, batch_size: int = 5000) -> int:
+        """
+        Fill search_vector for rows written before its trigger existed, in
+        short id-ordered batches so no long transaction or table-wide lock is
+        held; returns the number of rows filled
+        """
+        generated = await self.pool.fetchval("""
+            SELECT attgenerated = 's' FROM pg_attribute
+            WHERE attrelid = 'articles'::regclass AND attname = 'search_vector' AND NOT attisdropped
+        """)
+        if generated is None:
+            raise RuntimeError("articles.search_vector is missing; run create_table first")
+        if generated:
+            return 0
+
+        filled = 0
+        last_id = 0
+        while True:
+            ids = await self.pool.fetch("""
+                WITH batch AS (
+                    SELECT id FROM articles
+                    WHERE id > $1 AND search_vector IS NULL
+                    ORDER BY id LIMIT $2
+                )
+                UPDATE articles a SET search_vector = articles_search_document(a.title, a.content)
+                FROM batch WHERE a.id = batch.id
+                RETURNING a.id
+            """, last_id, batch_size)
+            if not ids:
+                return filled
+            filled += len(ids)
+            last_id = max(row["id"] for row in ids)
+            logger.info(f"Filled search_vector through id {last_id} ({filled} rows)")
     
-    async def save_prediction(self, url: str, content: str, mlp_label, hmm_label):
+    async def build_search_indexes(self):
+        """
+        CREATE INDEX CONCURRENTLY for the search indexes, so reads and writes
+        continue while they build. An index left invalid by an interrupted
+        build is dropped and rebuilt.
+        """
+        async with self.pool.acquire() as conn:
+            for name, definition in SEARCH_INDEXES:
+                valid = await conn.fetchval("""
+                    SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = $1 AND i.indrelid = 'articles'::regclass
+                """, name)
+                if valid:
+                    continue
+                try:
+                    if valid is False:
+                        logger.warning(f"Dropping invalid index {name}")
+                        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                    # Not inside a transaction: CONCURRENTLY refuses to run in one
+                    await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+                    logger.info(f"Built index {name}")
+                except Exception as e:
+                    logger.error(f"Building index {name} failed: {e}")
+    
+    async def relabel_neutral_predictions(self, batch_size: int = 5000) -> int:
+        """
+        Rewrite hmm/mlp values stored as "netral" to "neutral", the label the
+        stats, /news filters and exports count, in short id-ordered batches;
+        returns the number of rows changed
+        """
+        relabelled = 0
+        last_id = 0
+        while True:
+            ids = await self.pool.fetch("""
+                WITH batch AS (
+                    SELECT id FROM articles
+                    WHERE id > $1 AND (hmm = 'netral' OR mlp = 'netral')
+                    ORDER BY id LIMIT $2
+                )
+                UPDATE articles a SET
+                    hmm = CASE WHEN a.hmm = 'netral' THEN 'neutral' ELSE a.hmm END,
+                    mlp = CASE WHEN a.mlp = 'netral' THEN 'neutral' ELSE a.mlp END
+                FROM batch WHERE a.id = batch.id
+                RETURNING a.id
+            """, last_id, batch_size)
+            if not ids:
+                return relabelled
+            relabelled += len(ids)
+            last_id = max(row["id"] for row in ids)
+            logger.info(f"Relabelled neutral predictions through id {last_id} ({relabelled} rows)")
+    
+    async def migrate_feedback(self):
+        """Create the sentiment_feedback table behind /feedback"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                    await conn.execute(FEEDBACK_MIGRATION)
+        except Exception as e:
+            logger.error(f"sentiment_feedback migration failed: {e}")
+    
+    async def migrate_prediction_version(self):
+        """Add articles.model_version, written alongside every prediction"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                    await conn.execute(PREDICTION_VERSION_MIGRATION)
+        except Exception as e:
+            logger.error(f"model_version migration failed: {e}")
+    
+    async def migrate_article_stats(self, rebuild: bool = False):
+        """Install the article_stats summary and its triggers, building the row on first run"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                    await conn.execute(ARTICLE_STATS_MIGRATION)
+                    
+                    exists = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM article_stats WHERE id = 1)")
+                    if rebuild or not exists:
+                        await conn.execute(ARTICLE_STATS_REBUILD)
+                        logger.info("Rebuilt article_stats summary")
+        except Exception as e:
+            logger.error(f"article_stats migration failed: {e}")
+    
+    async def save_prediction(self, url: str, content: str, mlp_label, hmm_label, model_version=None):
         query = """
         UPDATE articles 
-        SET mlp = $2, hmm = $3
+        SET mlp = $2, hmm = $3, model_version = $4
         WHERE url = $1
         """
         try:
             async with self.pool.acquire() as conn:
-                result = await conn.execute(query, url, mlp_label, hmm_label)
+                result = await conn.execute(query, url, mlp_label, hmm_label, model_version)
             logger.info(f"Updated articles table: {url}")
         except Exception as e:
             logger.error(f"Database update error: {e}")
     
+    async def save_predictions(self, rows):
+        """Write many (url, mlp_label, hmm_label, model_version) rows in one set-based UPDATE; raises on failure"""
+        query = """
+        UPDATE articles AS a
+        SET mlp = v.mlp, hmm = v.hmm, model_version = v.model_version
+        FROM unnest($1::text[], $2::text[], $3::text[], $4::text[]) AS v(url, mlp, hmm, model_version)
+        WHERE a.url = v.url
+        """
+        urls, mlp_labels, hmm_labels, model_versions = (list(column) for column in zip(*rows))
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(query, urls, mlp_labels, hmm_labels, model_versions)
+        logger.info(f"Updated articles table: {len(rows)} predictions ({result})")
+    
+    async def fetch_feedback(self):
+        """Latest submitted label per article with its content, for folding into a retrain"""
+        query = """
+        SELECT DISTINCT ON (f.article_id) a.content, f.label
+        FROM sentiment_feedback f
+        JOIN articles a ON a.id = f.article_id
+        WHERE a.content IS NOT NULL AND a.content <> ''
+        ORDER BY f.article_id, f.created_at DESC, f.id DESC
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(query)
+    
     async def close(self):
-        if self.pool:
-            await self.pool.close()
\ No newline at end of file
+        # A pool shared with the API is closed by its owner in lifespan
+        if self.pool and self.owns_pool:
+            await self.pool.close()
+            self.pool = None
\ No newline at end of file
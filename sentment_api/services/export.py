@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from services.prediction_cache import json_default
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+EXPORT_COLUMNS = ["id", "title", "url", "published_at", "img", "hmm", "mlp"]
+
+
+def build_export_query(
+    sentiment_filter: Optional[str] = None,
+    model_filter: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_unscored: bool = False,
+    include_content: bool = False
+) -> Tuple[str, list, List[str]]:
+    """SELECT over articles for an export, ordered by id; returns (query, params, columns)"""
+    columns = EXPORT_COLUMNS + (["content"] if include_content else [])
+    models = [model_filter] if model_filter in ("hmm", "mlp") else ["hmm", "mlp"]
+
+    params = []
+    conditions = []
+    if sentiment_filter in ("positive", "negative", "neutral"):
+        params.append(sentiment_filter)
+        conditions.append("(" + " OR ".join(f"{model} = ${len(params)}" for model in models) + ")")
+    elif not include_unscored or model_filter in ("hmm", "mlp"):
+        conditions.append("(" + " OR ".join(f"{model} IS NOT NULL" for model in models) + ")")
+
+    if since is not None:
+        params.append(since)
+        conditions.append(f"published_at >= ${len(params)}")
+    if until is not None:
+        params.append(until)
+        conditions.append(f"published_at < ${len(params)}")
+
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"SELECT {', '.join(columns)} FROM articles{where_clause} ORDER BY id"
+    return query, params, columns
+
+
+class NdjsonEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows) -> bytes:
+        lines = [json.dumps(dict(row), default=json_default, ensure_ascii=False) for row in rows]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def _write(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def header(self) -> bytes:
+        return self._write([self.columns])
+
+    def encode(self, rows) -> bytes:
+        return self._write([[row[column] for column in self.columns] for row in rows])
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class ArrowEncoder:
+    """Arrow IPC stream: one record batch per cursor fetch. Needs the optional pyarrow package."""
+
+    def __init__(self, columns: List[str]):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            (column, pa.int64() if column == "id" else
+             pa.timestamp("us") if column == "published_at" else pa.string())
+            for column in columns
+        ])
+        self.buffer = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.buffer, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        return self._drain()
+
+    def encode(self, rows) -> bytes:
+        batch = self.pa.RecordBatch.from_pydict(
+            {column: [row[column] for row in rows] for column in self.columns},
+            schema=self.schema
+        )
+        self.writer.write_batch(batch)
+        return self._drain()
+
+    def footer(self) -> bytes:
+        self.writer.close()
+        return self._drain()
+
+
+def make_encoder(fmt: str, columns: List[str]):
+    if fmt == "csv":
+        return CsvEncoder(columns)
+    if fmt == "arrow":
+        return ArrowEncoder(columns)
+    return NdjsonEncoder(columns)
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ExportCursor:
+    """
+    Server-side cursor over an export query, with the connection and
+    read-only transaction it lives in. open() runs the query and fetches the
+    first batch, so a failing export surfaces before any response is sent;
+    the connection is borrowed here rather than from a route dependency so
+    it stays checked out for exactly as long as the response streams.
+    """
+
+    def __init__(self, pool, query: str, params: list, batch_size: int):
+        self.pool = pool
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.conn = None
+        self.transaction = None
+        self.cursor = None
+        self.first_rows = []
+
+    async def open(self):
+        self.conn = await self.pool.acquire()
+        try:
+            # Cursors only live inside a transaction
+            self.transaction = self.conn.transaction(readonly=True)
+            await self.transaction.start()
+            self.cursor = await self.conn.cursor(self.query, *self.params)
+            self.first_rows = await self.cursor.fetch(self.batch_size)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def fetch(self):
+        return await self.cursor.fetch(self.batch_size)
+
+    async def close(self):
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        try:
+            if self.transaction is not None and not conn.is_closed():
+                await self.transaction.rollback()
+        finally:
+            await self.pool.release(conn)
+
+
+async def stream_export(export: ExportCursor, encoder):
+    """
+    Yield encoded chunks of an opened export, one cursor batch at a time, so
+    memory stays flat whatever the result size; closes the export when done
+    """
+    try:
+        yield encoder.header()
+
+        exported = 0
+        rows = export.first_rows
+        while rows:
+            exported += len(rows)
+            yield encoder.encode(rows)
+            rows = await export.fetch()
+
+        yield encoder.footer()
+        logger.info(f"Exported {exported} articles")
+    finally:
+        await export.close()
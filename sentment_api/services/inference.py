@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from core.config import settings
+from services.text_cleaner import TextCleaner
+from services.prediction_cache import PredictionCache
+from models.artifacts import ModelArtifactStore
+from models.train_models import ModelTrainer
+from core.metrics import INFERENCE_PENDING, observe_stages
+
+logger = logging.getLogger(__name__)
+
+# Per-process state for process pool workers, set once by init_worker
+_worker_trainer = None
+_worker_cleaner = None
+
+
+class InferenceQueueFull(RuntimeError):
+    pass
+
+
+class InferenceTimeout(RuntimeError):
+    pass
+
+
+def load_version(model_version: str) -> ModelTrainer:
+    """
+    A ModelTrainer for a saved artifact, its weights memory-mapped instead of
+    unpickled so every process using the version shares the same read-only pages
+    """
+    model_trainer = ModelTrainer()
+    ModelArtifactStore().load_version(model_trainer, model_version)
+    return model_trainer
+
+
+def init_worker(model_trainer, model_version=None):
+    global _worker_trainer, _worker_cleaner
+    if model_version is not None:
+        model_trainer = load_version(model_version)
+    _worker_trainer = model_trainer
+    _worker_cleaner = TextCleaner()
+
+
+def score_texts(contents: List[str]) -> List[Optional[tuple]]:
+    """
+    Clean and score raw contents in a worker set up by init_worker; one
+    (mlp, hmm) pair of encoded labels per content, None where cleaning left
+    nothing to score
+    """
+    cleaned = _worker_cleaner.clean_many(contents)
+    scored = [i for i, text in enumerate(cleaned) if text and text.strip()]
+
+    labels = [None] * len(cleaned)
+    if scored:
+        predictions = _worker_trainer.predict_sentiment_batch([cleaned[i] for i in scored])
+        for i, prediction in zip(scored, predictions):
+            labels[i] = (prediction["mlp"]["encoded"], prediction["hmm"]["encoded"])
+    return labels
+
+
+# Workers return (result, stage timings) so timings measured inside a process
+# pool worker can still be recorded in the parent's metrics registry
+
+def _clean(texts, text_cleaner=None):
+    text_cleaner = text_cleaner or _worker_cleaner
+    started = time.perf_counter()
+    cleaned = text_cleaner.clean_many(texts)
+    return cleaned, {"clean": time.perf_counter() - started}
+
+
+def _predict(texts, model_trainer=None, model_version=None):
+    global _worker_trainer
+    if model_trainer is None and model_version is not None and _worker_trainer.model_version != model_version:
+        # The executor was rebound to another saved artifact; switch in place of a pool restart
+        _worker_trainer = load_version(model_version)
+    model_trainer = model_trainer or _worker_trainer
+    timings = {}
+    predictions = model_trainer.predict_sentiment_batch(texts, timings)
+    return predictions, timings
+
+
+class InferenceExecutor:
+    """
+    Runs text cleaning and model inference off the event loop.
+
+    INFERENCE_EXECUTOR selects a thread pool (models shared in-process) or a
+    process pool (each worker holds its own copy of the bound ModelTrainer;
+    rebinding to a saved artifact keeps the pool and workers map the new
+    version on their next call).
+    At most max_pending calls may be queued or running; callers either wait
+    for a slot or get InferenceQueueFull, and every call is bounded by a
+    timeout. With a PredictionCache, predict() only sends cache misses to the
+    pool.
+    """
+
+    def __init__(self, kind: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, timeout: Optional[float] = None,
+                 cache: Optional[PredictionCache] = None):
+        self.kind = (kind or settings.INFERENCE_EXECUTOR).lower()
+        if self.kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor: {self.kind}")
+
+        self.max_workers = max_workers or settings.INFERENCE_WORKERS
+        self.max_pending = max_pending or settings.INFERENCE_MAX_PENDING
+        self.timeout = timeout or settings.INFERENCE_TIMEOUT
+        self.model_trainer = None
+        # Saved artifact process pool workers load; None when they were handed a pickled trainer
+        self.worker_version: Optional[str] = None
+        self.cache = cache
+        self.text_cleaner = TextCleaner()
+        self.pool = None
+        self.pending = 0
+        self.rejected_count = 0
+        self.timeout_count = 0
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    def bind(self, model_trainer):
+        """Route subsequent calls to model_trainer; calls already submitted finish on the old one"""
+        old_pool = self.pool
+
+        if self.kind == "process":
+            initargs = self._worker_initargs(model_trainer)
+            self.worker_version = initargs[1]
+            # Only a trainer that is not on disk has to be shipped to fresh workers
+            if old_pool is None or self.worker_version is None:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=init_worker,
+                    initargs=initargs
+                )
+        elif old_pool is None:
+            self.pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+
+        self.model_trainer = model_trainer
+
+        if old_pool is not None and old_pool is not self.pool:
+            old_pool.shutdown(wait=False)
+
+        logger.info(f"Inference executor bound: kind={self.kind}, workers={self.max_workers}")
+
+    def _worker_initargs(self, model_trainer):
+        version = model_trainer.model_version
+        if settings.MODEL_MMAP and version and ModelArtifactStore().has_version(version):
+            return (None, version)
+        return (model_trainer, None)
+    
+    async def run(self, fn, *args, wait: bool = True, timeout: Optional[float] = None):
+        if self.pool is None:
+            raise ValueError("Inference executor not bound to a model")
+
+        if not wait and self._slots.locked():
+            self.rejected_count += 1
+            raise InferenceQueueFull(f"Inference queue full ({self.max_pending} pending)")
+
+        await self._slots.acquire()
+        self.pending += 1
+        INFERENCE_PENDING.inc()
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.pool, fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        # The slot is held until the work really finishes, even if the caller
+        # times out, so abandoned calls still count against the queue bound
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeout_count += 1
+            raise InferenceTimeout(f"Inference timed out after {timeout or self.timeout}s")
+
+    def _release(self):
+        self.pending -= 1
+        INFERENCE_PENDING.dec()
+        self._slots.release()
+
+    async def clean(self, texts: List[str], **kwargs) -> List[str]:
+        if self.kind == "process":
+            cleaned, timings = await self.run(_clean, texts, **kwargs)
+        else:
+            cleaned, timings = await self.run(_clean, texts, self.text_cleaner, **kwargs)
+        observe_stages(timings)
+        return cleaned
+
+    async def predict(self, texts: List[str], **kwargs) -> Tuple[list, Optional[str]]:
+        """
+        Predictions for texts and the model_version of the trainer that made
+        them; a rebind while the call runs does not change which one that is
+        """
+        model_trainer = self.model_trainer
+        worker_version = self.worker_version
+        model_version = model_trainer.model_version if model_trainer else None
+        if self.cache is None or model_version is None:
+            return await self._predict(texts, model_trainer, worker_version, **kwargs), model_version
+
+        results = await self.cache.get_many(texts, model_version)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            predictions = await self._predict(missing_texts, model_trainer, worker_version, **kwargs)
+            await self.cache.set_many(missing_texts, model_version, predictions)
+            for i, prediction in zip(missing, predictions):
+                results[i] = prediction
+
+        return results, model_version
+
+    async def _predict(self, texts: List[str], model_trainer, worker_version, **kwargs):
+        if self.kind == "process":
+            predictions, timings = await self.run(_predict, texts, None, worker_version, **kwargs)
+        else:
+            predictions, timings = await self.run(_predict, texts, model_trainer, **kwargs)
+        observe_stages(timings)
+        return predictions
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def get_stats(self):
+        stats = {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected_count": self.rejected_count,
+            "timeout_count": self.timeout_count
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        return stats
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+from core.locks import FileLock, FEEDBACK_LOCK_NAME, lock_dir
+from models.artifacts import ModelArtifactStore, split_version
+from models.train_models import ModelTrainer
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    """
+    Owns the live ModelTrainer.
+
+    Models are loaded or trained in a background task on a fresh ModelTrainer
+    that nothing else can see, and only a fully trained instance is published
+    to listeners (inference executor, consumer, app state) in one synchronous
+    step on the event loop. Requests therefore never observe a vectorizer from
+    one model with weights from another, and calls already running keep the
+    instance they started with.
+
+    Feedback updates are saved as <base>+fb<n> artifacts, so they survive
+    restarts and reach other workers through watch(); feedback_loader, when
+    given, supplies the stored corrections to every retrain.
+    """
+
+    def __init__(self, feedback_loader: Optional[Callable[[], Awaitable[Tuple[list, list]]]] = None):
+        self.model_trainer: Optional[ModelTrainer] = None
+        self.feedback_loader = feedback_loader
+        self.state = "idle"
+        self.error: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self.swap_count = 0
+        self.task: Optional[asyncio.Task] = None
+        self.watch_task: Optional[asyncio.Task] = None
+        self.listeners: List[Callable[[ModelTrainer], None]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.model_trainer is not None and self.model_trainer.training_completed
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def add_listener(self, listener: Callable[[ModelTrainer], None]):
+        self.listeners.append(listener)
+
+    def start(self) -> asyncio.Task:
+        """Load the latest artifact, or train, in the background"""
+        self.state = "loading"
+        self.task = asyncio.create_task(self._run(force_train=False))
+        return self.task
+
+    def retrain(self) -> bool:
+        """Train a new model in the background; False if a load or retrain is already running"""
+        if self.busy:
+            return False
+        self.state = "training"
+        self.task = asyncio.create_task(self._run(force_train=True))
+        return True
+
+    def watch(self, interval: float) -> asyncio.Task:
+        """Poll MODEL_DIR and swap in artifacts that other workers save after a retrain"""
+        self.watch_task = asyncio.create_task(self._watch(interval))
+        return self.watch_task
+
+    async def _watch(self, interval: float):
+        loop = asyncio.get_event_loop()
+        store = ModelArtifactStore()
+
+        while True:
+            await asyncio.sleep(interval)
+            if self.busy or not self.ready:
+                continue
+
+            try:
+                manifest = await loop.run_in_executor(None, store.find_latest_compatible)
+                if manifest is None or (
+                    split_version(manifest["version"]) <= split_version(self.model_trainer.model_version)
+                ):
+                    continue
+
+                async with self._lock:
+                    model_trainer = ModelTrainer()
+                    await loop.run_in_executor(None, store.load, model_trainer, manifest)
+                    self._swap(model_trainer)
+            except Exception as e:
+                logger.error(f"Model reload check failed: {e}")
+
+    async def apply_feedback(self, texts, y) -> bool:
+        """
+        Update the live models on labeled texts, save the result and swap it
+        in; False when a load or retrain is running, since its model would
+        replace the update anyway
+        """
+        if not self.ready:
+            raise ValueError("Models not ready")
+        if self.busy:
+            return False
+
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            # One process updates at a time, each starting from the newest saved
+            # model, so concurrent feedback in several workers is never lost
+            feedback_lock = FileLock(lock_dir() / FEEDBACK_LOCK_NAME)
+            await feedback_lock.acquire_async(poll_interval=0.05)
+            try:
+                model_trainer = await loop.run_in_executor(None, self._apply_feedback, texts, y)
+            finally:
+                feedback_lock.release()
+            self._swap(model_trainer)
+        return True
+
+    def _apply_feedback(self, texts, y) -> ModelTrainer:
+        store = ModelArtifactStore()
+        model_trainer = self.model_trainer
+
+        manifest = store.find_latest_compatible()
+        if manifest is not None and split_version(manifest["version"]) > split_version(model_trainer.model_version):
+            logger.info(f"Applying feedback on top of newer artifact {manifest['version']}")
+            model_trainer = ModelTrainer()
+            store.load(model_trainer, manifest)
+        elif not model_trainer.model_version:
+            # A model whose save failed after training; feedback versions need a saved base
+            logger.info("Saving the serving model before applying feedback")
+            model_trainer.save_artifacts()
+
+        updated = model_trainer.apply_feedback(texts, y)
+        try:
+            updated.save_artifacts()
+        except Exception as e:
+            # Still served from memory; the corrections are kept in sentiment_feedback for the next retrain
+            logger.error(f"Failed to save feedback model {updated.model_version}: {e}")
+        return updated
+
+    async def _run(self, force_train: bool):
+        async with self._lock:
+            self.state = "training" if force_train else "loading"
+            self.error = None
+            model_trainer = ModelTrainer()
+
+            try:
+                await model_trainer.load_or_train(force_train=force_train, feedback_loader=self.feedback_loader)
+            except Exception as e:
+                logger.error(f"Model {self.state} failed: {e}")
+                self.error = str(e)
+                # A failed retrain leaves the current model serving
+                self.state = "ready" if self.ready else "failed"
+                return
+
+            self._swap(model_trainer)
+
+    def _swap(self, model_trainer: ModelTrainer):
+        previous = self.model_trainer.model_version if self.model_trainer else None
+
+        self.model_trainer = model_trainer
+        for listener in self.listeners:
+            listener(model_trainer)
+
+        self.loaded_at = datetime.now()
+        self.swap_count += 1
+        self.state = "ready"
+        logger.info(f"Model swapped in: {model_trainer.model_version} (previous: {previous})")
+
+    async def stop(self):
+        for task in (self.task, self.watch_task):
+            if task and not task.done():
+                task.cancel()
+
+    def get_status(self):
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "model_version": self.model_trainer.model_version if self.model_trainer else None,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "swap_count": self.swap_count,
+            "error": self.error
+        }
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def json_default(value):
+    # numpy scalars (labels, encoded classes) are not JSON serializable as-is
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def copy_prediction(value: dict) -> dict:
+    """Copy of a cached prediction down to its per-model dicts, so callers cannot alter cached entries"""
+    return {key: dict(item) if isinstance(item, dict) else item for key, item in value.items()}
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of model predictions.
+
+    Keys are a hash of the model input text and the model version, so a new
+    model never serves predictions cached for an older one. Lookups go to an
+    in-process LRU first (bounded by size and TTL) and then, when REDIS_URL is
+    set, to a Redis tier shared by every process.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None,
+                 redis_url: Optional[str] = None):
+        self.max_size = settings.PREDICTION_CACHE_SIZE if max_size is None else max_size
+        self.ttl = settings.PREDICTION_CACHE_TTL if ttl is None else ttl
+        self.redis_url = settings.REDIS_URL if redis_url is None else redis_url
+        self.redis = None
+        self.entries = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis_errors = 0
+
+    async def connect(self):
+        if not self.redis_url:
+            return
+
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed; using local cache only")
+            return
+
+        try:
+            self.redis = aioredis.from_url(self.redis_url)
+            await self.redis.ping()
+            logger.info("Prediction cache connected to Redis")
+        except Exception as e:
+            logger.error(f"Prediction cache Redis connection failed: {e}")
+            self.redis = None
+
+    @staticmethod
+    def make_key(text: str, model_version: str) -> str:
+        digest = hashlib.sha256(f"{model_version}\0{text}".encode("utf-8")).hexdigest()
+        return f"{settings.PREDICTION_CACHE_REDIS_PREFIX}{digest}"
+
+    def _get_local(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return copy_prediction(value)
+
+    def _set_local(self, key: str, value):
+        if self.max_size <= 0:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl, copy_prediction(value))
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, texts: List[str], model_version: str) -> List[Optional[dict]]:
+        keys = [self.make_key(text, model_version) for text in texts]
+        results = [self._get_local(key) for key in keys]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.local_hits += len(keys) - len(missing)
+
+        if missing and self.redis is not None:
+            try:
+                values = await self.redis.mget([keys[i] for i in missing])
+            except Exception as e:
+                logger.error(f"Prediction cache Redis read error: {e}")
+                self.redis_errors += 1
+                values = [None] * len(missing)
+
+            for i, value in zip(missing, values):
+                if value is not None:
+                    results[i] = json.loads(value)
+                    self._set_local(keys[i], results[i])
+                    self.redis_hits += 1
+
+        self.misses += sum(1 for result in results if result is None)
+        return results
+
+    async def set_many(self, texts: List[str], model_version: str, predictions: List[dict]):
+        keys = [self.make_key(text, model_version) for text in texts]
+        for key, value in zip(keys, predictions):
+            self._set_local(key, value)
+
+        if self.redis is None or not keys:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in zip(keys, predictions):
+                    # Milliseconds, so sub-second TTLs do not round down to an invalid 0
+                    pipe.set(key, json.dumps(value, default=json_default), px=max(1, int(self.ttl * 1000)))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Prediction cache Redis write error: {e}")
+            self.redis_errors += 1
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    def get_stats(self):
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "redis_enabled": self.redis is not None,
+            "redis_errors": self.redis_errors
+        }
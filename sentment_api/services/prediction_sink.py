@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from core.config import settings
+from services.database import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionSink:
+    """
+    Write-behind buffer in front of DatabaseService.save_predictions.
+
+    submit() queues a prediction and returns once the UPDATE containing it has
+    committed, so callers ack their message only after the write is durable.
+    The buffer is flushed when it reaches max_batch predictions or
+    flush_interval seconds after the first buffered one, whichever is first.
+    A failed flush raises in every submit() it covered. Repeated URLs within a
+    batch are collapsed to the latest prediction, matching what sequential
+    updates would leave behind.
+    """
+
+    def __init__(self, db_service: DatabaseService, max_batch: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.db_service = db_service
+        self.max_batch = max_batch or settings.DB_SINK_BATCH_SIZE
+        self.flush_interval = settings.DB_SINK_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.pending: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+        self.waiters: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flush_tasks = set()
+        self.closed = False
+        self.flush_count = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self._flush_lock = asyncio.Lock()
+
+    async def submit(self, url: str, mlp_label, hmm_label, model_version: Optional[str] = None):
+        if self.closed:
+            raise RuntimeError("Prediction sink is closed")
+        for label in (mlp_label, hmm_label):
+            # Reject here so one bad row cannot fail the whole batch's UPDATE
+            if label is not None and not isinstance(label, str):
+                raise TypeError(f"Prediction label must be text, got {type(label).__name__}: {label!r}")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending[url] = (mlp_label, hmm_label, model_version)
+        self.waiters.append(future)
+
+        if len(self.pending) >= self.max_batch:
+            self._start_flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.flush_interval, self._start_flush)
+
+        await future
+
+    def _start_flush(self):
+        task = asyncio.create_task(self.flush())
+        self.flush_tasks.add(task)
+        task.add_done_callback(self.flush_tasks.discard)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if not self.pending:
+                return
+
+            pending, waiters = self.pending, self.waiters
+            self.pending, self.waiters = {}, []
+            rows = [(url, *labels) for url, labels in pending.items()]
+
+            try:
+                await self.db_service.save_predictions(rows)
+            except Exception as e:
+                logger.error(f"Prediction sink flush of {len(rows)} rows failed: {e}")
+                self.failed_rows += len(rows)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                return
+
+            self.flush_count += 1
+            self.flushed_rows += len(rows)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def stop(self):
+        """Flush everything buffered; later submits are rejected"""
+        self.closed = True
+        await self.flush()
+        if self.flush_tasks:
+            await asyncio.gather(*self.flush_tasks, return_exceptions=True)
+
+    def get_stats(self):
+        return {
+            "batch_size": self.max_batch,
+            "flush_interval": self.flush_interval,
+            "buffered": len(self.pending),
+            "flush_count": self.flush_count,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows
+        }
@@ -0,0 +1,55 @@
+import json
+import re
+from pathlib import Path
+from typing import Optional, Set
+from core.config import settings
+
+DEFAULT_STOPWORDS_PATH = Path(__file__).with_name("indonesian_stopwords.json")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TS_CONFIG_PATTERN = re.compile(r"^[a-z_]+$")
+
+
+def search_ts_config() -> str:
+    """Text search configuration used by the search_vector column, validated for SQL interpolation"""
+    config = settings.SEARCH_TS_CONFIG.lower()
+    if not TS_CONFIG_PATTERN.match(config):
+        raise ValueError(f"Invalid SEARCH_TS_CONFIG: {settings.SEARCH_TS_CONFIG}")
+    return config
+
+
+class SearchQueryBuilder:
+    """
+    Turns a free-text search box query into a to_tsquery() expression.
+
+    Stopwords from indonesian_stopwords.json are dropped (PostgreSQL's own
+    indonesian configuration only stems), the last word is matched as a
+    prefix so results follow the user while typing, and unless content
+    search is requested lexemes are restricted to the title weight.
+    """
+
+    def __init__(self, stopwords_path: Path = DEFAULT_STOPWORDS_PATH):
+        self.stopwords = self._load_stopwords(stopwords_path)
+
+    def _load_stopwords(self, path: Path) -> Set[str]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return set()
+
+    def build(self, q: str, in_content: bool = False) -> Optional[str]:
+        raw_tokens = TOKEN_PATTERN.findall(q.lower())
+        tokens = [token for token in raw_tokens if token not in self.stopwords]
+        if not tokens:
+            return None
+
+        weights = "" if in_content else "A"
+        terms = [f"'{token}':{weights}" if weights else f"'{token}'" for token in tokens]
+
+        # Only the word still being typed is a prefix; when that word was a
+        # dropped stopword ("harga di"), the surviving last word is complete
+        if not q[-1].isspace() and raw_tokens[-1] not in self.stopwords:
+            terms[-1] = f"'{tokens[-1]}':*{weights}"
+
+        return " & ".join(terms)
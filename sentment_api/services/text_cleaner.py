@@ -1,9 +1,12 @@
 import json
 import re
 import string
-from typing import Optional, Set
+from typing import Iterable, List, Optional, Set
 from pathlib import Path
 
+# Deletes every ASCII punctuation character, same as the character class regex it replaces
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
 class TextCleaner:
     def __init__(self, stopwords_path: str = './indonesian_stopwords.json'):
         self.stopwords = self._load_stopwords(stopwords_path)
@@ -18,24 +21,32 @@ class TextCleaner:
             return set()
     
     def _compile_patterns(self):
+        # Order matters: each pass sees the output of the previous one, so the
+        # passes are kept separate rather than merged into alternations.
+        # The third field lists literals a pass cannot match without; when
+        # none of them occur in the text the pass is skipped entirely.
+        patterns = [
+            (r'&\w+;', '', ('&',)),
+            (r'^\s*[\w]+\.\s*[\w]+\s*,\s*[\w]+\s*(?:-|–|&nbsp;|\||\s)*\s*', '', None),
+            (r'\b[\w\s]+\bberkontribusi\b[\w\s]*', '', ('berkontribusi',)),
+            (r'simak\s*(?:juga\s*)?video\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]))', '', ('simak',)),
+            (r'saksikan\s*(?:live|langsung)\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]))', '', ('saksikan',)),
+            (r'pilihan editor\s*:.*$', '', ('pilihan editor',)),
+            (r'(?:simak\s*(?:juga\s*)?video|saksikan\s*(?:live|langsung)|tonton\s*(?:video|tayangan)|lihat\s*(?:juga\s*)?video|baca\s*(?:berita\s*)?selengkapnya)\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]|\.))', '', ('simak', 'saksikan', 'tonton', 'lihat', 'baca')),
+            (r'simak (?:juga |)(?:video|berita).*?(?:\.|$)', '', ('simak ',)),
+            (r'saksikan (?:live|langsung).*?(?:\.|$)', '', ('saksikan ',)),
+            (r'baca (?:juga|selengkapnya).*?(?:\.|$)', '', ('baca ',)),
+            (r'tonton (?:video|tayangan).*?(?:\.|$)', '', ('tonton ',)),
+            (r'lihat (?:selengkapnya|juga|lebih detail).*?(?:\.|$)', '', ('lihat ',)),
+            (r'http[s]?://\S+', '', ('http',)),
+            (r'@\w+|#\w+', '', ('@', '#')),
+            (r'©\s*\d{4}\s*[\w\s]+\.?\s*all rights? reserved\.?', '', ('©',)),
+            (r'[^\w\s.,!?-]', ' ', None),
+            (r'([.,!?-])\1+', r'\1', None)
+        ]
         return [
-            (r'&\w+;', ''),
-            (r'^\s*[\w]+\.\s*[\w]+\s*,\s*[\w]+\s*(?:-|–|&nbsp;|\||\s)*\s*', ''),
-            (r'\b[\w\s]+\bberkontribusi\b[\w\s]*', ''),
-            (r'simak\s*(?:juga\s*)?video\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]))', ''),
-            (r'saksikan\s*(?:live|langsung)\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]))', ''),
-            (r'pilihan editor\s*:.*$', ''),
-            (r'(?:simak\s*(?:juga\s*)?video|saksikan\s*(?:live|langsung)|tonton\s*(?:video|tayangan)|lihat\s*(?:juga\s*)?video|baca\s*(?:berita\s*)?selengkapnya)\s*[:\-]?\s*.*?(?:$|(?=\s+[A-Z]|\.))', ''),
-            (r'simak (?:juga |)(?:video|berita).*?(?:\.|$)', ''),
-            (r'saksikan (?:live|langsung).*?(?:\.|$)', ''),
-            (r'baca (?:juga|selengkapnya).*?(?:\.|$)', ''),
-            (r'tonton (?:video|tayangan).*?(?:\.|$)', ''),
-            (r'lihat (?:selengkapnya|juga|lebih detail).*?(?:\.|$)', ''),
-            (r'http[s]?://\S+', ''),
-            (r'@\w+|#\w+', ''),
-            (r'©\s*\d{4}\s*[\w\s]+\.?\s*all rights? reserved\.?', ''),
-            (r'[^\w\s.,!?-]', ' '),
-            (r'([.,!?-])\1+', r'\1')
+            (re.compile(pattern), replacement, literals)
+            for pattern, replacement, literals in patterns
         ]
     
     def clean(self, text: Optional[str]) -> str:
@@ -44,13 +55,19 @@ class TextCleaner:
         
         text = text.lower()
         
-        for pattern, replacement in self.patterns:
-            text = re.sub(pattern, replacement, text)
+        for pattern, replacement, literals in self.patterns:
+            if literals is None or any(literal in text for literal in literals):
+                text = pattern.sub(replacement, text)
         
-        text = re.sub(f"[{re.escape(string.punctuation)}]", "", text)
+        text = text.translate(PUNCTUATION_TABLE)
+        stopwords = self.stopwords
         tokens = [
             token for token in text.strip().split() 
-            if token not in self.stopwords and len(token) > 1
+            if len(token) > 1 and token not in stopwords
         ]
         
         return " ".join(tokens)
+    
+    def clean_many(self, texts: Iterable[Optional[str]]) -> List[str]:
+        clean = self.clean
+        return [clean(text) for text in texts]
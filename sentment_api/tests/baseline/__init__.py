@@ -0,0 +1,4 @@
+"""
+Verbatim copies of implementations that were later optimized, kept so tests
+can pin the optimized versions to the original behaviour.
+"""
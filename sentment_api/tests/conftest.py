@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Modules import each other as top-level packages (core, models, services),
+# the way they resolve when run from sentment_api/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,143 @@
+import contextlib
+import copy
+import io
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from benchmarks.fixtures import make_trainer
+from core.config import settings
+from models.artifacts import ModelArtifactStore, split_version
+from models.dataset_cache import FeaturizedDataset
+from models.hmm_model import HMM
+from models.train_models import ModelTrainer
+from services.model_manager import ModelManager
+
+FEEDBACK_TEXTS = ["kata1 kata2 kata3", "kata4 kata5 kata5", "kata7 kata8"]
+FEEDBACK_LABELS = ["positive", "negative", "neutral"]
+
+
+@pytest.fixture(scope="module")
+def trainer():
+    # MLP.train prints its loss
+    with contextlib.redirect_stdout(io.StringIO()):
+        return make_trainer(n_docs=200, max_features=300, hidden_size=16, seed=5)
+
+
+def counts(seed, n_samples, n_states=3, n_emissions=80):
+    rng = np.random.default_rng(seed)
+    X = sp.csr_matrix(rng.poisson(0.3, size=(n_samples, n_emissions)).astype(np.float64))
+    return X, rng.integers(0, n_states, n_samples)
+
+
+def test_hmm_partial_fit_matches_full_fit():
+    X_a, y_a = counts(1, 300)
+    X_b, y_b = counts(2, 120)
+
+    full = HMM(3, 80)
+    full.fit(sp.vstack([X_a, X_b], format="csr"), np.concatenate([y_a, y_b]))
+
+    incremental = HMM(3, 80)
+    incremental.fit(X_a, y_a)
+    incremental.partial_fit(X_b, y_b)
+
+    for name in ("class_counts", "word_counts", "pi", "A", "B", "log_pi", "log_B"):
+        np.testing.assert_allclose(getattr(incremental, name), getattr(full, name), rtol=1e-12, err_msg=name)
+    X_test, _ = counts(3, 50)
+    np.testing.assert_array_equal(incremental.predict(X_test), full.predict(X_test))
+
+
+def test_apply_feedback_bumps_version(trainer):
+    trainer.model_version = "20240101T000000000000-abc"
+    y = trainer.label_indices(FEEDBACK_LABELS)
+
+    first = trainer.apply_feedback(FEEDBACK_TEXTS, y)
+    second = first.apply_feedback(FEEDBACK_TEXTS[:1], y[:1])
+
+    assert first.model_version == "20240101T000000000000-abc+fb3"
+    assert second.model_version == "20240101T000000000000-abc+fb4"
+    assert (first.feedback_count, second.feedback_count) == (3, 4)
+    # The served original is untouched
+    assert trainer.model_version == "20240101T000000000000-abc" and trainer.feedback_count == 0
+    np.testing.assert_array_equal(
+        first.hmm_model.class_counts - trainer.hmm_model.class_counts, np.bincount(y, minlength=3)
+    )
+
+
+def test_feedback_on_unsaved_model_saves_base_first(trainer, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_DIR", str(tmp_path))
+    unsaved = copy.copy(trainer)
+    unsaved.model_version = None
+    y = unsaved.label_indices(FEEDBACK_LABELS)
+
+    with pytest.raises(ValueError):
+        unsaved.apply_feedback(FEEDBACK_TEXTS, y)
+
+    manager = ModelManager()
+    manager.model_trainer = unsaved
+    updated = manager._apply_feedback(FEEDBACK_TEXTS, y)
+
+    # The serving model got a real base version, so the update orders after it
+    assert unsaved.model_version and ModelArtifactStore().has_version(unsaved.model_version)
+    assert updated.model_version == f"{unsaved.model_version}+fb3"
+
+
+def test_feedback_versions_order_between_base_and_next_retrain():
+    versions = [
+        "20240102T000000000000-abc",
+        "20240101T000000000000-abc+fb10",
+        "20240101T000000000000-abc",
+        "20240101T000000000000-abc+fb9",
+    ]
+    assert sorted(versions, key=split_version) == [
+        "20240101T000000000000-abc",
+        "20240101T000000000000-abc+fb9",
+        "20240101T000000000000-abc+fb10",
+        "20240102T000000000000-abc",
+    ]
+
+
+def test_partial_fit_on_memory_mapped_artifact(trainer, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_MMAP", True)
+    trainer.model_version = None
+    store = ModelArtifactStore(str(tmp_path))
+    base_version = store.save(trainer)
+
+    loaded = ModelTrainer()
+    store.load_version(loaded, base_version)
+    assert isinstance(loaded.hmm_model.word_counts, np.memmap)
+    assert isinstance(loaded.mlp_model.W1, np.memmap)
+    word_counts_before = np.array(loaded.hmm_model.word_counts)
+    W1_before = np.array(loaded.mlp_model.W1)
+
+    updated = loaded.apply_feedback(FEEDBACK_TEXTS, loaded.label_indices(FEEDBACK_LABELS))
+
+    # The read-only maps are left alone; the update lives in new arrays
+    np.testing.assert_array_equal(loaded.hmm_model.word_counts, word_counts_before)
+    np.testing.assert_array_equal(loaded.mlp_model.W1, W1_before)
+    assert not np.array_equal(updated.mlp_model.W1, W1_before)
+    assert updated.hmm_model.word_counts.sum() > word_counts_before.sum()
+
+    # Saved next to its base and restored with its feedback count
+    assert updated.save_artifacts(str(tmp_path)) == f"{base_version}+fb3"
+    reloaded = ModelTrainer()
+    assert store.load_latest(reloaded) == f"{base_version}+fb3"
+    assert reloaded.feedback_count == 3
+    np.testing.assert_array_equal(reloaded.hmm_model.word_counts, updated.hmm_model.word_counts)
+
+
+def test_retrain_adds_feedback_to_training_split(trainer, monkeypatch):
+    X = trainer.vectorizer.transform([f"kata{i} kata{i + 1}" for i in range(100)])
+    y = np.arange(100) % 3
+    dataset = FeaturizedDataset(sp.csr_matrix(X), y, trainer.vectorizer, trainer.label_encoder)
+    monkeypatch.setattr(settings, "DATASET_CACHE_ENABLED", False)
+    monkeypatch.setattr(ModelTrainer, "_featurize_datasets", lambda self: dataset)
+
+    X_train, X_test, y_train, y_test = ModelTrainer()._prepare_data()
+    fb_X_train, fb_X_test, fb_y_train, fb_y_test = ModelTrainer()._prepare_data((FEEDBACK_TEXTS, FEEDBACK_LABELS))
+
+    assert fb_X_train.shape[0] == X_train.shape[0] + len(FEEDBACK_TEXTS)
+    np.testing.assert_array_equal(fb_y_train[-3:], trainer.label_indices(FEEDBACK_LABELS))
+    assert (fb_X_test != X_test).nnz == 0
+    np.testing.assert_array_equal(fb_y_test, y_test)
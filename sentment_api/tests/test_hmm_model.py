@@ -0,0 +1,52 @@
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+from models.hmm_model import HMM
+from tests.baseline.hmm_model import HMM as BaselineHMM
+
+
+def make_data(n_samples=400, n_features=60, n_states=3, seed=0):
+    # Short documents keep the baseline's linear-space products above underflow
+    rng = np.random.default_rng(seed)
+    X = rng.poisson(0.15, (n_samples, n_features)).astype(np.float64)
+    y = rng.integers(0, n_states, n_samples)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def models():
+    X, y = make_data()
+    baseline = BaselineHMM(3, X.shape[1])
+    baseline.fit(X, y)
+    model = HMM(3, X.shape[1])
+    model.fit(sp.csr_matrix(X), y)
+    return X, baseline, model
+
+
+def test_fit_matches_baseline(models):
+    _, baseline, model = models
+    np.testing.assert_allclose(model.pi, baseline.pi)
+    np.testing.assert_allclose(model.A, baseline.A)
+    np.testing.assert_allclose(model.B, baseline.B)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_predict_proba_matches_baseline(models, sparse):
+    X, baseline, model = models
+    X_test, _ = make_data(n_samples=200, seed=1)
+    expected = baseline.predict_proba(X_test)
+
+    actual = model.predict_proba(sp.csr_matrix(X_test) if sparse else X_test)
+
+    assert np.abs(actual - expected).max() < 1e-12
+    np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+
+
+def test_predict_proba_survives_underflow(models):
+    _, _, model = models
+    # Long documents underflow the baseline to all-zero rows; log space still normalizes
+    long_doc = np.full((1, model.n_emissions), 50.0)
+    probs = model.predict_proba(long_doc)
+    assert np.isfinite(probs).all()
+    assert probs.sum() == pytest.approx(1.0)
@@ -0,0 +1,28 @@
+import json
+
+from benchmarks import load_test
+
+
+def run_load_test(tmp_path, *argv):
+    output = tmp_path / "report.json"
+    assert load_test.main([*argv, "--output", str(output)]) == 0
+    return json.loads(output.read_text())
+
+
+def test_sink_batch_raises_prefetch(tmp_path):
+    """A sink batch larger than prefetch must not turn every write into a flush-interval wait"""
+    messages, flush_interval = 200, 1.0
+    report = run_load_test(
+        tmp_path,
+        "--messages", str(messages),
+        "--batch-size", "1",
+        "--prefetch", "1",
+        "--sink-batch-size", "50",
+        "--sink-flush-interval", str(flush_interval),
+        "--db-latency", "0",
+    )
+
+    assert report["config"]["prefetch"] == 50
+    assert report["outcomes"] == {"ack": messages}
+    # With prefetch 1 each message would sit out the whole flush interval
+    assert report["elapsed_s"] < messages * flush_interval / 20
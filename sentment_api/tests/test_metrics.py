@@ -0,0 +1,32 @@
+from prometheus_client.parser import text_string_to_metric_families
+
+from core.metrics import MESSAGES_IN_FLIGHT, MESSAGES_TOTAL, observe_stages, render_metrics
+
+
+def samples():
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(render_metrics().decode("utf-8"))
+        for sample in family.samples
+    }
+
+
+def test_observe_stages_records_histograms():
+    before = samples().get(("sentiment_stage_seconds_count", (("stage", "clean"),)), 0)
+    observe_stages({"clean": 0.002, "predict": 0.004})
+    observe_stages(None)
+
+    after = samples()
+    assert after[("sentiment_stage_seconds_count", (("stage", "clean"),))] == before + 1
+    assert after[("sentiment_stage_seconds_bucket", (("le", "0.0025"), ("stage", "clean")))] >= 1
+    assert ("sentiment_stage_seconds_sum", (("stage", "predict"),)) in after
+
+
+def test_counter_and_gauge_exposition():
+    MESSAGES_TOTAL.labels("processed").inc(3)
+    MESSAGES_IN_FLIGHT.inc(2)
+    MESSAGES_IN_FLIGHT.inc(-2)
+
+    after = samples()
+    assert after[("sentiment_messages_total", (("outcome", "processed"),))] >= 3
+    assert after[("sentiment_messages_in_flight", ())] == 0
@@ -0,0 +1,56 @@
+import asyncio
+
+from services.prediction_cache import PredictionCache
+
+
+def prediction(label="positif"):
+    return {
+        "mlp": {"sentiment": "1", "confidence": 0.9, "encoded": label},
+        "hmm": {"sentiment": "1", "confidence": 0.8, "encoded": label},
+    }
+
+
+class FakePipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, **kwargs):
+        self.calls.append((key, kwargs))
+
+    async def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.calls = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.calls)
+
+
+def test_local_hits_are_copies():
+    cache = PredictionCache(max_size=10, ttl=60, redis_url="")
+    stored = prediction()
+    asyncio.run(cache.set_many(["teks"], "v1", [stored]))
+    stored["mlp"]["encoded"] = "changed after set"
+
+    first = asyncio.run(cache.get_many(["teks"], "v1"))[0]
+    first["mlp"]["encoded"] = "changed by caller"
+    first["extra"] = True
+
+    assert asyncio.run(cache.get_many(["teks"], "v1"))[0] == prediction()
+
+
+def test_sub_second_ttl_is_sent_in_milliseconds():
+    cache = PredictionCache(max_size=10, ttl=0.25, redis_url="")
+    cache.redis = FakeRedis()
+    asyncio.run(cache.set_many(["a", "b"], "v1", [prediction(), prediction("negatif")]))
+
+    assert [kwargs for _, kwargs in cache.redis.calls] == [{"px": 250}, {"px": 250}]
@@ -0,0 +1,32 @@
+import pytest
+
+from services.search import SearchQueryBuilder
+
+
+@pytest.fixture(scope="module")
+def builder():
+    builder = SearchQueryBuilder()
+    assert "di" in builder.stopwords
+    return builder
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("harga", "'harga':*A"),
+    ("harga beras", "'harga':A & 'beras':*A"),
+    ("harga beras ", "'harga':A & 'beras':A"),
+    ("harga di", "'harga':A"),
+    ("harga di ", "'harga':A"),
+    ("banjir di jak", "'banjir':A & 'jak':*A"),
+])
+def test_prefix_only_on_word_being_typed(builder, q, expected):
+    assert builder.build(q) == expected
+
+
+def test_content_search_has_no_weight(builder):
+    assert builder.build("harga di", in_content=True) == "'harga'"
+    assert builder.build("harga ber", in_content=True) == "'harga' & 'ber':*"
+
+
+def test_only_stopwords(builder):
+    assert builder.build("di") is None
+    assert builder.build("?!") is None
@@ -0,0 +1,59 @@
+import pytest
+
+from benchmarks.fixtures import BOILERPLATE, SENTENCES, make_articles
+from services.search import DEFAULT_STOPWORDS_PATH
+from services.text_cleaner import TextCleaner
+from tests.baseline.text_cleaner import TextCleaner as BaselineTextCleaner
+
+EDGE_CASES = [
+    None,
+    "",
+    "   ",
+    "\n\t",
+    "a b c",
+    "Harga naik!!! Turun??? --- ...",
+    "Baca juga: berita lain. Sisa kalimat",
+    "Simak Video: Banjir Jakarta Lalu Warga Mengungsi",
+    "Pilihan Editor: Daftar pemenang",
+    "&nbsp;&quot;Kami&quot; &amp; mereka",
+    "JAKARTA, KOMPAS.com - Pemerintah menyatakan sesuatu",
+    "Kunjungi https://www.detik.com/video dan http://x.y/z?a=1",
+    "@detikcom #BeritaTerkini ©  2024 Tempo Media Group. All rights reserved.",
+    "Reporter ini berkontribusi dalam penulisan artikel",
+    "ünïcödé — “kutipan” ‘tunggal’ … emoji 🎉 selesai",
+    "Tonton tayangan lengkap. Lihat selengkapnya di sini. Saksikan live sekarang",
+]
+
+
+def corpus():
+    return EDGE_CASES + SENTENCES + BOILERPLATE + make_articles(300, sentences=25, boilerplate_ratio=0.4, seed=7)
+
+
+@pytest.fixture(scope="module")
+def cleaners():
+    return TextCleaner(str(DEFAULT_STOPWORDS_PATH)), BaselineTextCleaner(str(DEFAULT_STOPWORDS_PATH))
+
+
+def test_stopwords_loaded(cleaners):
+    cleaner, _ = cleaners
+    assert cleaner.stopwords
+
+
+def test_clean_matches_baseline(cleaners):
+    cleaner, baseline = cleaners
+    for text in corpus():
+        assert cleaner.clean(text) == baseline.clean(text), repr(text)
+
+
+def test_clean_many_matches_baseline(cleaners):
+    cleaner, baseline = cleaners
+    texts = corpus()
+    assert cleaner.clean_many(texts) == [baseline.clean(text) for text in texts]
+
+
+def test_empty_input(cleaners):
+    cleaner, _ = cleaners
+    assert cleaner.clean(None) == ""
+    assert cleaner.clean("") == ""
+    assert cleaner.clean_many([]) == []
+    assert cleaner.clean_many([None, ""]) == ["", ""]
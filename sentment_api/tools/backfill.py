@@ -0,0 +1,256 @@
+"""
+Rescore articles whose predictions are missing or came from another model,
+without re-publishing them to the consumer queue.
+
+Matching rows are read in id order, one short keyset query per batch (no
+transaction or snapshot is held across batches, so vacuum is never
+blocked), cleaned and scored across a process pool (the same TextCleaner
+and ModelTrainer as the consumer, each worker memory-mapping the saved
+artifact) and written back with one UPDATE per batch. The last written id is
+checkpointed after every batch, so an interrupted run resumes where it
+stopped. Rows scored by a /feedback update of the run's model (<base>+fb<n>)
+share its base version and are not stale. Run from sentment_api/:
+
+    python -m tools.backfill --missing
+    python -m tools.backfill --stale --since 2024-01-01
+    python -m tools.backfill --missing --stale --dry-run
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+from core.config import settings
+from models.artifacts import ModelArtifactStore, split_version
+from services import inference
+from services.database import DatabaseService, create_db_pool, to_published_at
+
+logger = logging.getLogger(__name__)
+
+
+def published_at(value: str) -> datetime:
+    """--since/--until: ISO 8601, with an offset or as UTC"""
+    return to_published_at(datetime.fromisoformat(value))
+
+
+def build_selection(args, model_version: str):
+    """WHERE conditions and parameters for the rows this run rescores"""
+    params = []
+    targets = []
+    if args.missing:
+        targets.append("(mlp IS NULL OR hmm IS NULL)")
+    if args.stale:
+        # Feedback updates of the same base model (<base>+fb<n>) count as current
+        params.append(split_version(model_version)[0])
+        targets.append(f"split_part(model_version, '+fb', 1) IS DISTINCT FROM ${len(params)}")
+
+    conditions = ["url IS NOT NULL", "content IS NOT NULL", "content <> ''"]
+    if targets:
+        conditions.append("(" + " OR ".join(targets) + ")")
+    if args.since is not None:
+        params.append(args.since)
+        conditions.append(f"published_at >= ${len(params)}")
+    if args.until is not None:
+        params.append(args.until)
+        conditions.append(f"published_at < ${len(params)}")
+    return conditions, params
+
+
+def selection_key(args, model_version: str) -> dict:
+    """What a checkpoint is only valid for"""
+    return {
+        "missing": args.missing,
+        "stale": args.stale,
+        "since": args.since.isoformat() if args.since else None,
+        "until": args.until.isoformat() if args.until else None,
+        "model_version": model_version,
+    }
+
+
+class Checkpoint:
+    def __init__(self, path: str, selection: dict):
+        self.path = path
+        self.selection = selection
+        self.last_id = 0
+        self.scored = 0
+        self.empty = 0
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("selection") != self.selection:
+            raise ValueError(
+                f"Checkpoint {self.path} belongs to a different selection {state.get('selection')}; "
+                "use --restart or another --checkpoint"
+            )
+        self.last_id = state["last_id"]
+        self.scored = state["scored"]
+        self.empty = state["empty"]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "selection": self.selection,
+            "last_id": self.last_id,
+            "scored": self.scored,
+            "empty": self.empty,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def resolve_model_version(requested: Optional[str]) -> str:
+    store = ModelArtifactStore()
+    if requested:
+        if not store.has_version(requested):
+            raise ValueError(f"Model artifact {requested} not found in {store.base_dir}")
+        return requested
+
+    manifest = store.find_latest_compatible()
+    if manifest is None:
+        raise ValueError(f"No compatible model artifact in {store.base_dir}; start the API once to train one")
+    return manifest["version"]
+
+
+async def score_batch(loop, pool, rows, workers: int):
+    chunk_size = -(-len(rows) // workers)
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    results = await asyncio.gather(*(
+        loop.run_in_executor(pool, inference.score_texts, [row["content"] for row in chunk]) for chunk in chunks
+    ))
+    return [labels for chunk in results for labels in chunk]
+
+
+async def run(args):
+    model_version = resolve_model_version(args.model_version)
+    checkpoint = Checkpoint(args.checkpoint, selection_key(args, model_version))
+    if not args.restart:
+        checkpoint.load()
+
+    conditions, params = build_selection(args, model_version)
+    conditions.append(f"id > ${len(params) + 1}")
+    where_clause = " WHERE " + " AND ".join(conditions)
+
+    db_pool = await create_db_pool()
+    db_service = DatabaseService(db_pool)
+    await db_service.migrate_prediction_version()
+
+    try:
+        if args.dry_run:
+            remaining = await db_pool.fetchval(
+                f"SELECT COUNT(*) FROM articles{where_clause}", *params, checkpoint.last_id
+            )
+            return {"model_version": model_version, "resume_after_id": checkpoint.last_id, "remaining": remaining}
+
+        query = f"SELECT id, url, content FROM articles{where_clause} ORDER BY id LIMIT ${len(params) + 2}"
+        remaining = args.limit or None
+
+        async def fetch_batch(after_id: int):
+            # Each batch is its own short statement, seeking past the last id on the primary key
+            nonlocal remaining
+            size = args.batch_size if remaining is None else min(args.batch_size, remaining)
+            if size <= 0:
+                return []
+            rows = await db_pool.fetch(query, *params, after_id, size)
+            if remaining is not None:
+                remaining -= len(rows)
+            return rows
+
+        logger.info(f"Backfilling with model {model_version} after id {checkpoint.last_id} ({args.workers} workers)")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        scored_before = checkpoint.scored
+
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=inference.init_worker,
+            initargs=(None, model_version)
+        ) as pool:
+            rows = await fetch_batch(checkpoint.last_id)
+
+            while rows:
+                scoring = asyncio.ensure_future(score_batch(loop, pool, rows, args.workers))
+                # Read the next batch while this one is being scored
+                next_rows = await fetch_batch(rows[-1]["id"])
+                labels = await scoring
+
+                updates = [
+                    (row["url"], label[0], label[1], model_version)
+                    for row, label in zip(rows, labels) if label is not None
+                ]
+                if updates:
+                    await db_service.save_predictions(updates)
+
+                checkpoint.last_id = rows[-1]["id"]
+                checkpoint.scored += len(updates)
+                checkpoint.empty += len(rows) - len(updates)
+                checkpoint.save()
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Backfilled through id {checkpoint.last_id}: {checkpoint.scored} scored, "
+                    f"{checkpoint.empty} empty ({(checkpoint.scored - scored_before) / elapsed:.1f} rows/s)"
+                )
+                rows = next_rows
+
+        elapsed = time.perf_counter() - started
+        return {
+            "model_version": model_version,
+            "last_id": checkpoint.last_id,
+            "scored": checkpoint.scored,
+            "empty": checkpoint.empty,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round((checkpoint.scored - scored_before) / elapsed, 2) if elapsed else None,
+            "checkpoint": checkpoint.path,
+        }
+    finally:
+        await db_pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rescore articles with missing or stale predictions")
+    parser.add_argument("--missing", action="store_true", help="Rows with a NULL mlp or hmm prediction")
+    parser.add_argument("--stale", action="store_true",
+                        help="Rows scored by any model other than the one used for this run "
+                             "(or a /feedback update of it)")
+    parser.add_argument("--since", type=published_at, help="Only articles published at or after this time")
+    parser.add_argument("--until", type=published_at, help="Only articles published before this time")
+    parser.add_argument("--model-version", help="Artifact version to score with (default: newest compatible)")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Rows per batch query and bulk UPDATE")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many rows (0 = no limit)")
+    parser.add_argument("--checkpoint", default=os.path.join(settings.MODEL_DIR, "backfill-checkpoint.json"))
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be rescored")
+    args = parser.parse_args(argv)
+
+    if not (args.missing or args.stale or args.since or args.until):
+        parser.error("choose rows with --missing, --stale, --since or --until")
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        report = asyncio.run(run(args))
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
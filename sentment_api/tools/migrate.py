@@ -0,0 +1,60 @@
+"""
+Schema changes too heavy for API startup. The lifespan only applies cheap
+catalog changes (create_table); this step fills search_vector for existing
+articles in short batches and builds the search indexes with CREATE INDEX
+CONCURRENTLY, so the articles table stays readable and writable throughout.
+Predictions stored as "netral" are relabelled "neutral" the same way. Safe
+to rerun. Run from sentment_api/ after deploying:
+
+    python -m tools.migrate
+    python -m tools.migrate --skip-backfill
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from services.database import DatabaseService, create_db_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def run(args):
+    db_pool = await create_db_pool()
+    db_service = DatabaseService(db_pool)
+    try:
+        started = time.perf_counter()
+        await db_service.create_table()
+
+        filled = 0
+        if not args.skip_backfill:
+            filled = await db_service.backfill_search_vectors(args.batch_size)
+        await db_service.build_search_indexes()
+        relabelled = await db_service.relabel_neutral_predictions(args.batch_size)
+
+        return {
+            "search_vectors_filled": filled,
+            "neutral_relabelled": relabelled,
+            "elapsed_s": round(time.perf_counter() - started, 3)
+        }
+    finally:
+        await db_pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill search vectors, build the search indexes and relabel neutral predictions")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per search_vector or relabel UPDATE")
+    parser.add_argument("--skip-backfill", action="store_true", help="Only build the indexes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())